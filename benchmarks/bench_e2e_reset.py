@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Reset-time comparison: record-level cleanup vs snapshot restore.
+
+For each fixture size N, creates N records in a scratch collection and
+times deleting them one by one (superuser_delete), then creates N records
+again and times DBSnapshot.reset() back to the empty state.
+
+Needs a disposable PocketBase instance (restore replaces ALL data) with
+superuser credentials configured like the other scripts.
+
+Usage:
+  python benchmarks/bench_e2e_reset.py [--sizes 10,100,1000]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                "skills", "pocketbase", "scripts"))
+
+from pb_config import pb_authed_request, PBRequestError
+from pb_e2e_helpers import DBSnapshot, superuser_delete
+
+COLLECTION = "bench_reset"
+
+
+def _create(n):
+    ids = []
+    for i in range(n):
+        data = pb_authed_request("POST", f"/api/collections/{COLLECTION}/records",
+                                 {"title": f"fixture {i}"})
+        ids.append(data["id"])
+    return ids
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", default="10,100,1000")
+    args = parser.parse_args()
+    sizes = [int(s) for s in args.sizes.split(",")]
+
+    try:
+        pb_authed_request("POST", "/api/collections", {
+            "name": COLLECTION, "type": "base",
+            "fields": [{"name": "title", "type": "text"}],
+        })
+    except PBRequestError:
+        pass  # left over from a previous run
+
+    snap = DBSnapshot("bench_reset_snapshot.zip").ensure(rebuild=True)
+    print(f"{'records':>8} {'cleanup s':>10} {'restore s':>10}")
+    try:
+        for n in sizes:
+            ids = _create(n)
+            started = time.monotonic()
+            for record_id in ids:
+                superuser_delete(COLLECTION, record_id)
+            cleanup = time.monotonic() - started
+
+            _create(n)
+            restore = snap.reset()
+            print(f"{n:>8} {cleanup:>10.2f} {restore:>10.2f}")
+    finally:
+        snap.delete()
+        pb_authed_request("DELETE", f"/api/collections/{COLLECTION}")
+
+
+if __name__ == "__main__":
+    main()
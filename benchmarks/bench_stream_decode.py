@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Peak-RSS benchmark: buffered pb_request vs incremental pb_stream_list.
+
+Serves one synthetic list page from a local HTTP server and decodes it in a
+fresh child process per mode, reporting the child's peak RSS and wall time.
+No PocketBase instance is needed.
+
+The ``baseline`` row imports pb_config and decodes nothing (0 items): it is
+the interpreter's own RSS, to subtract from the other two rows.
+
+PocketBase returns at most 1000 items per page, so the page size is capped
+there; the difference between the modes grows with record size (large
+json/editor fields), not with the number of records in a collection.
+
+Usage:
+  python benchmarks/bench_stream_decode.py [--items 1000] [--size 50000]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# PocketBase's maximum perPage
+MAX_PER_PAGE = 1000
+
+SCRIPTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                           "skills", "pocketbase", "scripts")
+
+CHILD = r"""
+import resource, sys, time
+sys.path.insert(0, sys.argv[1])
+from pb_config import pb_request, pb_stream_list
+mode, path = sys.argv[2], sys.argv[3]
+started = time.perf_counter()
+count = 0
+if mode == "buffered":
+    for item in pb_request("GET", path)["items"]:
+        count += 1
+elif mode == "stream":
+    for item in pb_stream_list(path):
+        count += 1
+elapsed = time.perf_counter() - started
+# VmHWM is per address space; ru_maxrss on Linux survives exec and would
+# report the parent's peak instead.
+try:
+    with open("/proc/self/status") as f:
+        peak = next(int(l.split()[1]) * 1024 for l in f if l.startswith("VmHWM"))
+except OSError:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    peak *= 1 if sys.platform == "darwin" else 1024
+print(count, peak, elapsed)
+"""
+
+
+def _make_body(items, size):
+    page = {"page": 1, "perPage": items, "totalItems": items, "totalPages": 1,
+            "items": [{"id": f"{i:015d}", "title": "x" * size, "n": i}
+                      for i in range(items)]}
+    return json.dumps(page).encode("utf-8")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--items", type=int, default=MAX_PER_PAGE,
+                        help=f"Items in the page (max {MAX_PER_PAGE}, like the server)")
+    parser.add_argument("--size", type=int, default=50000,
+                        help="Approximate bytes per record")
+    args = parser.parse_args()
+    if not 0 < args.items <= MAX_PER_PAGE:
+        parser.error(f"--items must be between 1 and {MAX_PER_PAGE}")
+
+    body = _make_body(args.items, args.size)
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *a):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    env = dict(os.environ, PB_URL=f"http://127.0.0.1:{server.server_port}")
+
+    print(f"payload: {len(body) / 1e6:.1f} MB, {args.items} items "
+          "(baseline = interpreter only, no request)")
+    print(f"{'mode':<10} {'items':>8} {'peak RSS MB':>12} {'seconds':>8}")
+    for mode in ("baseline", "buffered", "stream"):
+        out = subprocess.run(
+            [sys.executable, "-c", CHILD, SCRIPTS_DIR, mode, "/api/collections/x/records"],
+            env=env, capture_output=True, text=True, check=True).stdout.split()
+        count, rss, secs = int(out[0]), int(out[1]), float(out[2])
+        print(f"{mode:<10} {count:>8} {rss / 1e6:>12.1f} {secs:>8.2f}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
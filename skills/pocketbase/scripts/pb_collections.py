@@ -10,6 +10,7 @@ Usage:
   python scripts/pb_collections.py update <name_or_id> '<json>'
   python scripts/pb_collections.py delete <name_or_id>
   python scripts/pb_collections.py import --file collections.json
+  python scripts/pb_collections.py sync --file collections.json [--dry-run]
 """
 
 import argparse
@@ -103,6 +104,318 @@ def cmd_import(args):
         sys.exit(1)
 
 
+def cmd_sync(args):
+    desired = _load_json_file(args.file)
+    if isinstance(desired, dict):
+        desired = desired.get("collections", [])
+    try:
+        live = fetch_all_collections()
+        plan = plan_sync(live, desired)
+    except PBRequestError as e:
+        print_result(False, e.status, e.data)
+        sys.exit(1)
+
+    summary = {"create": 0, "update": 0, "unchanged": 0}
+    for step in plan:
+        summary[step["action"]] += 1
+    report = [{k: v for k, v in step.items() if k != "body"} for step in plan]
+
+    if args.dry_run:
+        print_result(True, 200, {"dryRun": True, "summary": summary, "plan": report})
+        return
+
+    try:
+        applied = apply_sync(plan)
+    except PBRequestError as e:
+        print_result(False, e.status, e.data)
+        sys.exit(1)
+    print_result(True, 200, {
+        "message": f"Synced {applied} collection(s)",
+        "summary": summary,
+        "plan": report,
+    })
+
+
+# ---------------------------------------------------------------------------
+# Sync (minimal-diff import)
+# ---------------------------------------------------------------------------
+
+RULE_KEYS = ("listRule", "viewRule", "createRule", "updateRule", "deleteRule",
+             "authRule", "manageRule")
+
+# Top-level keys that are server-managed or handled separately by the diff.
+_SYNC_SKIP_KEYS = {"id", "created", "updated", "system", "fields", "indexes"}
+
+
+def fetch_all_collections(per_page=200, target=None):
+    """Fetch every collection definition, following pagination."""
+    items = []
+    page = 1
+    while True:
+        data = pb_authed_request(
+            "GET", f"/api/collections?page={page}&perPage={per_page}",
+            target=target)
+        items.extend(data.get("items", []))
+        if page >= data.get("totalPages", 1):
+            return items
+        page += 1
+
+
+def _subset_equal(desired, live):
+    """Compare values, ignoring dict keys absent from the desired side.
+
+    Live definitions carry server defaults (``hidden``, ``presentable``, ...)
+    that a hand-written schema usually omits; those must not count as changes.
+    """
+    if isinstance(desired, dict):
+        if not isinstance(live, dict):
+            return False
+        return all(k in live and _subset_equal(v, live[k])
+                   for k, v in desired.items())
+    if isinstance(desired, list):
+        if not isinstance(live, list) or len(desired) != len(live):
+            return False
+        return all(_subset_equal(d, l) for d, l in zip(desired, live))
+    return desired == live
+
+
+def _normalize_index(sql):
+    return " ".join(sql.split()).rstrip(";").lower()
+
+
+def _match_live_field(field, live_fields):
+    """Find the live field a desired field corresponds to (by id, then name)."""
+    if field.get("id"):
+        for lf in live_fields:
+            if lf.get("id") == field["id"]:
+                return lf
+    for lf in live_fields:
+        if lf.get("name") == field.get("name"):
+            return lf
+    return None
+
+
+def diff_collection(live, desired):
+    """
+    Compute the changes needed to turn a live collection into the desired one.
+
+    Returns:
+        (changes, patch) — a report dict (empty when up to date) and the
+        PATCH body containing only the changed top-level keys.
+    """
+    changes = {}
+    patch = {}
+
+    # Fields: compare individually, but PATCH must carry the full field set.
+    # Live ids are carried over so PocketBase updates columns in place
+    # instead of dropping and recreating them.
+    if "fields" in desired:
+        live_fields = live.get("fields", [])
+        matched_ids = set()
+        new_fields = []
+        added, changed = [], []
+        for field in desired["fields"]:
+            lf = _match_live_field(field, live_fields)
+            field = dict(field)
+            if lf is None:
+                added.append(field.get("name"))
+            else:
+                matched_ids.add(lf.get("id"))
+                field.setdefault("id", lf.get("id"))
+                compare = {k: v for k, v in field.items() if k != "id"}
+                if not _subset_equal(compare, lf):
+                    changed.append(field.get("name"))
+            new_fields.append(field)
+        removed, kept_system = [], []
+        for lf in live_fields:
+            if lf.get("id") in matched_ids:
+                continue
+            if lf.get("system"):
+                # System fields cannot be removed; keep them in the payload.
+                kept_system.append(lf)
+            else:
+                removed.append(lf.get("name"))
+        new_fields = kept_system + new_fields
+        if added or changed or removed:
+            changes["fields"] = {"added": added, "changed": changed,
+                                 "removed": removed}
+            patch["fields"] = new_fields
+
+    for key in RULE_KEYS:
+        if key in desired and desired[key] != live.get(key):
+            changes.setdefault("rules", []).append(key)
+            patch[key] = desired[key]
+
+    if "indexes" in desired:
+        live_idx = {_normalize_index(i) for i in live.get("indexes") or []}
+        want_idx = {_normalize_index(i) for i in desired["indexes"] or []}
+        if live_idx != want_idx:
+            changes["indexes"] = {
+                "added": [i for i in desired["indexes"]
+                          if _normalize_index(i) not in live_idx],
+                "removed": [i for i in live.get("indexes") or []
+                            if _normalize_index(i) not in want_idx],
+            }
+            patch["indexes"] = desired["indexes"]
+
+    for key, value in desired.items():
+        if key in _SYNC_SKIP_KEYS or key in RULE_KEYS:
+            continue
+        if not _subset_equal(value, live.get(key)):
+            changes.setdefault("other", []).append(key)
+            patch[key] = value
+
+    return changes, patch
+
+
+def _relation_targets(collection):
+    return {f["collectionId"] for f in collection.get("fields", [])
+            if f.get("type") == "relation" and f.get("collectionId")}
+
+
+def _remap_relations(collection, remap):
+    """Point relation fields at live collection ids.
+
+    Returns the (possibly copied) collection and the ``{old: new}`` ids used.
+    """
+    used, fields = {}, []
+    for field in collection.get("fields", []):
+        target = field.get("collectionId")
+        if field.get("type") == "relation" and target in remap:
+            field = dict(field, collectionId=remap[target])
+            used[target] = remap[target]
+        fields.append(field)
+    if not used:
+        return collection, used
+    return dict(collection, fields=fields), used
+
+
+def _dependency_order(desired, aliases=None):
+    """Order collections so relation targets come before the collections
+    that reference them. Cycles keep their original relative order.
+
+    ``aliases`` maps extra references (live collection ids) to names, so a
+    schema without ids can still point relations at existing collections.
+    """
+    index = {}
+    for i, c in enumerate(desired):
+        for ref in (c.get("id"), c.get("name")):
+            if ref:
+                index[ref] = i
+    for ref, name in (aliases or {}).items():
+        if name in index:
+            index.setdefault(ref, index[name])
+    deps = []
+    for i, c in enumerate(desired):
+        deps.append({index[t] for t in _relation_targets(c)
+                     if t in index and index[t] != i})
+
+    ordered, done = [], set()
+    while len(ordered) < len(desired):
+        progressed = False
+        for i in range(len(desired)):
+            if i not in done and deps[i] <= done:
+                ordered.append(i)
+                done.add(i)
+                progressed = True
+        if not progressed:
+            # Cycle: take the first pending collection and continue.
+            i = next(i for i in range(len(desired)) if i not in done)
+            ordered.append(i)
+            done.add(i)
+    return [desired[i] for i in ordered]
+
+
+def plan_sync(live, desired):
+    """
+    Build an ordered sync plan from live and desired collection lists.
+
+    Each step is a dict with ``collection``, ``action`` (create, update or
+    unchanged), ``changes`` and the request ``body``. Collections that exist
+    only on the server are left untouched.
+
+    A desired collection that exists on the server under another id (same
+    name) keeps its live id; relations pointing at the desired id are
+    rewritten to it and listed in the step's ``remappedIds``.
+    """
+    live_by_id = {c["id"]: c for c in live}
+    live_by_name = {c["name"]: c for c in live}
+    remap = {}
+    for coll in desired:
+        cid = coll.get("id")
+        if cid and cid not in live_by_id and coll.get("name") in live_by_name:
+            remap[cid] = live_by_name[coll["name"]]["id"]
+    remapped = [_remap_relations(coll, remap) for coll in desired]
+    used_by_name = {c.get("name"): used for c, used in remapped}
+
+    plan = []
+    aliases = {c["id"]: c["name"] for c in live}
+    for coll in _dependency_order([c for c, _ in remapped], aliases):
+        current = live_by_id.get(coll.get("id")) or live_by_name.get(coll.get("name"))
+        if current is None:
+            step = {"collection": coll.get("name"), "action": "create",
+                    "changes": {}, "body": coll}
+        else:
+            changes, patch = diff_collection(current, coll)
+            step = {
+                "collection": coll.get("name"),
+                "id": current["id"],
+                "action": "update" if patch else "unchanged",
+                "changes": changes,
+                "body": patch,
+            }
+        if used_by_name.get(coll.get("name")):
+            step["remappedIds"] = used_by_name[coll.get("name")]
+        plan.append(step)
+    return plan
+
+
+def apply_sync(plan):
+    """
+    Execute a sync plan. Returns the number of collections written.
+
+    New collections whose relations point at collections that do not exist
+    yet (self-references, cycles) are created without those fields first
+    and patched with the full field set once every collection exists.
+    """
+    existing = set()
+    for step in plan:
+        if step["action"] != "create":
+            existing.update({step["id"], step["collection"]})
+
+    written = 0
+    deferred = []
+    for step in plan:
+        if step["action"] == "unchanged":
+            continue
+        if step["action"] == "update":
+            pb_authed_request("PATCH", f"/api/collections/{step['id']}",
+                              data=step["body"])
+            written += 1
+            continue
+
+        body = step["body"]
+        missing = {t for t in _relation_targets(body) if t not in existing}
+        if missing:
+            first = dict(body)
+            first["fields"] = [f for f in body["fields"]
+                               if not (f.get("type") == "relation"
+                                       and f.get("collectionId") in missing)]
+            created = pb_authed_request("POST", "/api/collections", data=first)
+            deferred.append((created["id"], body["fields"]))
+        else:
+            created = pb_authed_request("POST", "/api/collections", data=body)
+        existing.update({created["id"], created["name"]})
+        written += 1
+
+    for coll_id, fields in deferred:
+        live = pb_authed_request("GET", f"/api/collections/{coll_id}")
+        _, patch = diff_collection(live, {"fields": fields})
+        if patch:
+            pb_authed_request("PATCH", f"/api/collections/{coll_id}", data=patch)
+    return written
+
+
 # ---------------------------------------------------------------------------
 # Helpers
 # ---------------------------------------------------------------------------
@@ -181,6 +494,14 @@ def main():
     p_import.add_argument("--file", required=True, help="JSON file with collections")
     p_import.set_defaults(func=cmd_import)
 
+    # sync
+    p_sync = sub.add_parser("sync",
+        help="Apply only changed collections (PATCH in dependency order)")
+    p_sync.add_argument("--file", required=True, help="JSON file with collections")
+    p_sync.add_argument("--dry-run", action="store_true",
+                        help="Print the plan without applying it")
+    p_sync.set_defaults(func=cmd_sync)
+
     args = parser.parse_args()
     args.func(args)
 
@@ -3,16 +3,37 @@ PocketBase shared configuration, authentication, and HTTP helpers.
 All PB scripts import this module.
 """
 
+import atexit
+import codecs
+import http.client
 import json
 import os
+import re
 import sys
+import threading
+import time
 import urllib.error
+import urllib.parse
 import urllib.request
 
 # ---------------------------------------------------------------------------
 # Configuration
 # ---------------------------------------------------------------------------
 
+def _find_upwards(filename):
+    """Return the path of ``filename`` in cwd or the nearest parent, or None."""
+    search_dir = os.path.abspath(os.getcwd())
+    while True:
+        candidate = os.path.join(search_dir, filename)
+        if os.path.isfile(candidate):
+            return candidate
+        parent = os.path.dirname(search_dir)
+        if parent == search_dir:
+            # Reached filesystem root
+            return None
+        search_dir = parent
+
+
 def _load_env_file():
     """Read .env file from cwd or nearest parent directory (simple key=value parser).
 
@@ -20,19 +41,9 @@ def _load_env_file():
     directories until a .env file is found or the filesystem root is reached.
     This supports monorepo setups where scripts run from a subdirectory.
     """
-    # Walk up from cwd to find the nearest .env file
-    search_dir = os.path.abspath(os.getcwd())
-    env_path = None
-    while True:
-        candidate = os.path.join(search_dir, ".env")
-        if os.path.isfile(candidate):
-            env_path = candidate
-            break
-        parent = os.path.dirname(search_dir)
-        if parent == search_dir:
-            # Reached filesystem root without finding .env
-            return
-        search_dir = parent
+    env_path = _find_upwards(".env")
+    if env_path is None:
+        return
 
     with open(env_path, "r") as f:
         for line in f:
@@ -51,11 +62,92 @@ PB_URL = os.environ.get("PB_URL", "http://127.0.0.1:8090").rstrip("/")
 PB_SUPERUSER_EMAIL = os.environ.get("PB_SUPERUSER_EMAIL", "")
 PB_SUPERUSER_PASSWORD = os.environ.get("PB_SUPERUSER_PASSWORD", "")
 
+# ---------------------------------------------------------------------------
+# Target profiles (multi-instance)
+# ---------------------------------------------------------------------------
+
+DEFAULT_TARGETS_FILE = "pb_targets.json"
+
+_targets = None
+
+
+def load_targets():
+    """
+    Load named target profiles (read once per process).
+
+    The file is taken from PB_TARGETS_FILE, or the nearest pb_targets.json
+    found like .env. Format:
+
+        {"tenant-a": {"url": "https://a.example.com",
+                      "email": "admin@example.com", "password": "..."}}
+
+    Missing credentials fall back to PB_SUPERUSER_EMAIL/PASSWORD; a profile
+    without a url is an error (it would otherwise hit PB_URL).
+
+    Returns:
+        Dict of name -> {"name", "url", "email", "password"}.
+    """
+    global _targets
+    if _targets is not None:
+        return _targets
+
+    path = os.environ.get("PB_TARGETS_FILE") or _find_upwards(DEFAULT_TARGETS_FILE)
+    _targets = {}
+    if not path:
+        return _targets
+    try:
+        with open(path, "r") as f:
+            raw = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        print_result(False, 0, {"message": f"Cannot read targets file {path}: {e}"})
+        sys.exit(1)
+    for name, profile in raw.items():
+        if not str(profile.get("url") or "").strip():
+            print_result(False, 0, {"message": f"Target '{name}' in {path} has no url"})
+            sys.exit(1)
+        _targets[name] = {
+            "name": name,
+            "url": profile["url"].strip().rstrip("/"),
+            "email": profile.get("email", PB_SUPERUSER_EMAIL),
+            "password": profile.get("password", PB_SUPERUSER_PASSWORD),
+        }
+    return _targets
+
+
+def get_target(name=None):
+    """
+    Resolve a target profile by name. None returns the default target built
+    from PB_URL / PB_SUPERUSER_EMAIL / PB_SUPERUSER_PASSWORD.
+    """
+    if name is None:
+        return {"name": None, "url": PB_URL, "email": PB_SUPERUSER_EMAIL,
+                "password": PB_SUPERUSER_PASSWORD}
+    targets = load_targets()
+    if name not in targets:
+        print_result(False, 0, {"message": f"Unknown target: {name}"})
+        sys.exit(1)
+    return targets[name]
+
+
 # ---------------------------------------------------------------------------
 # HTTP helper
 # ---------------------------------------------------------------------------
 
-def pb_request(method, path, data=None, token=None, raw_response=False):
+_request_listeners = []
+
+
+def add_request_listener(fn):
+    """Call fn(method, path, status, elapsed_seconds) after every live request."""
+    _request_listeners.append(fn)
+
+
+def remove_request_listener(fn):
+    if fn in _request_listeners:
+        _request_listeners.remove(fn)
+
+
+def pb_request(method, path, data=None, token=None, raw_response=False,
+               base_url=None):
     """
     Send an HTTP request to the PocketBase API.
 
@@ -65,6 +157,7 @@ def pb_request(method, path, data=None, token=None, raw_response=False):
         data: Dict to send as JSON body (for POST/PUT/PATCH).
         token: Auth token for Authorization header (raw, no Bearer prefix).
         raw_response: If True, return (status, parsed_json) tuple.
+        base_url: Instance URL to use instead of PB_URL.
 
     Returns:
         Parsed JSON response, or (status, parsed_json) if raw_response=True.
@@ -72,13 +165,26 @@ def pb_request(method, path, data=None, token=None, raw_response=False):
     Raises:
         SystemExit on HTTP errors (after printing structured output).
     """
-    url = PB_URL + path if path.startswith("/") else PB_URL + "/" + path
+    base_url = base_url or PB_URL
+    if not path.startswith("/"):
+        path = "/" + path
 
+    if _cassette is not None and _cassette.mode == "replay":
+        hit = _cassette.lookup(method, path, data)
+        if hit is not None:
+            status, parsed = hit
+            if raw_response:
+                return status, parsed
+            if status >= 400:
+                raise PBRequestError(status, parsed)
+            return parsed
+
+    started = time.perf_counter()
     body = None
     if data is not None:
         body = json.dumps(data).encode("utf-8")
 
-    req = urllib.request.Request(url, data=body, method=method)
+    req = urllib.request.Request(base_url + path, data=body, method=method)
     req.add_header("Content-Type", "application/json")
     if token:
         req.add_header("Authorization", token)
@@ -88,18 +194,23 @@ def pb_request(method, path, data=None, token=None, raw_response=False):
             status = resp.status
             raw = resp.read()
             parsed = json.loads(raw) if raw else None
-            if raw_response:
-                return status, parsed
-            return parsed
     except urllib.error.HTTPError as e:
         status = e.code
         try:
             parsed = json.loads(e.read())
         except Exception:
             parsed = {"message": str(e)}
-        if raw_response:
-            return status, parsed
+
+    elapsed = time.perf_counter() - started
+    for listener in _request_listeners:
+        listener(method, path, status, elapsed)
+    if _cassette is not None and _cassette.mode == "record":
+        _cassette.record(method, path, data, status, parsed)
+    if raw_response:
+        return status, parsed
+    if status >= 400:
         raise PBRequestError(status, parsed)
+    return parsed
 
 
 class PBRequestError(Exception):
@@ -109,57 +220,447 @@ class PBRequestError(Exception):
         self.data = data
         super().__init__(f"HTTP {status}: {data}")
 
+    def __reduce__(self):
+        # Rebuild from (status, data) when sent back from a worker process
+        return (self.__class__, (self.status, self.data))
+
+
+class ListStream:
+    """
+    Incrementally decode a PocketBase list response from a file-like body.
+
+    Iterating yields the entries of the top-level ``items`` array as they
+    are read off the socket, so only one record (plus a read chunk) is held
+    in memory at a time. Page metadata (page, perPage, totalItems,
+    totalPages) is collected into ``meta``; keys that precede ``items`` in
+    the body (PocketBase's order) are available as soon as the first item
+    is yielded, the rest once iteration finishes.
+    """
+
+    _WS = " \t\r\n"
+
+    def __init__(self, fp, chunk_size=65536):
+        self.meta = {}
+        self._fp = fp
+        self._chunk_size = chunk_size
+        self._text = codecs.getincrementaldecoder("utf-8")()
+        self._buf = ""
+        self._pos = 0
+        self._eof = False
+        self._decoder = json.JSONDecoder()
+        self._items = self._parse()
+
+    def __iter__(self):
+        return self._items
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._items.close()
+        self._fp.close()
+
+    def _fill(self):
+        """Read one more chunk. Returns False at end of input."""
+        if self._eof:
+            return False
+        chunk = self._fp.read(self._chunk_size)
+        if not chunk:
+            self._eof = True
+            self._buf = self._buf[self._pos:] + self._text.decode(b"", final=True)
+            self._pos = 0
+            return False
+        # Drop consumed text so the buffer stays around one chunk in size.
+        self._buf = self._buf[self._pos:] + self._text.decode(chunk)
+        self._pos = 0
+        return True
+
+    def _peek(self):
+        """Skip whitespace and return the next character ('' at EOF)."""
+        while True:
+            buf, pos = self._buf, self._pos
+            while pos < len(buf) and buf[pos] in self._WS:
+                pos += 1
+            self._pos = pos
+            if pos < len(buf):
+                return buf[pos]
+            if not self._fill():
+                return ""
+
+    def _expect(self, char):
+        if self._peek() != char:
+            raise ValueError(f"Unexpected list response: expected {char!r} "
+                             f"at {self._buf[self._pos:self._pos + 20]!r}")
+        self._pos += 1
+
+    def _value(self):
+        """Decode one JSON value, reading more input until it is complete."""
+        self._peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buf, self._pos)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+            # A scalar ending exactly at the buffer edge may be truncated
+            # (e.g. "12" of "123"); make sure a delimiter follows.
+            if end == len(self._buf) and self._fill():
+                continue
+            self._pos = end
+            return value
+
+    def _parse(self):
+        try:
+            self._expect("{")
+            while True:
+                char = self._peek()
+                if char == "}":
+                    self._pos += 1
+                    return
+                if char == ",":
+                    self._pos += 1
+                    continue
+                key = self._value()
+                self._expect(":")
+                if key != "items":
+                    self.meta[key] = self._value()
+                    continue
+                self._expect("[")
+                while True:
+                    char = self._peek()
+                    if char == "]":
+                        self._pos += 1
+                        break
+                    if char == ",":
+                        self._pos += 1
+                        continue
+                    yield self._value()
+        finally:
+            self._fp.close()
+
+
+class PBConnection:
+    """
+    Persistent (keep-alive) connection to one PocketBase instance.
+
+    pb_request opens a new socket per call; use this for tight loops that
+    issue many requests to the same host (probing, paging, file fetches).
+    Not thread-safe: use one connection per thread.
+    """
+
+    def __init__(self, base_url=None, timeout=30):
+        parts = urllib.parse.urlsplit(base_url or PB_URL)
+        self._cls = (http.client.HTTPSConnection if parts.scheme == "https"
+                     else http.client.HTTPConnection)
+        self._netloc = parts.netloc
+        self._prefix = parts.path.rstrip("/")
+        self._timeout = timeout
+        self._conn = None
+
+    def _connect(self):
+        if self._conn is None:
+            self._conn = self._cls(self._netloc, timeout=self._timeout)
+        return self._conn
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def open(self, method, path, data=None, token=None, headers=None, body=None):
+        """
+        Send a request and return the open http.client.HTTPResponse.
+        The caller must read the body fully before the next request.
+        Reconnects once if the server closed the idle connection.
+
+        ``body`` sends raw bytes or an iterable of byte chunks (streamed with
+        chunked encoding) instead of JSON ``data``; set Content-Type in
+        ``headers``. Iterable bodies are not retried.
+        """
+        if body is None and data is not None:
+            body = json.dumps(data).encode("utf-8")
+        replayable = body is None or isinstance(body, (bytes, bytearray))
+        hdrs = {"Content-Type": "application/json"}
+        if token:
+            hdrs["Authorization"] = token
+        hdrs.update(headers or {})
+        for attempt in (0, 1):
+            conn = self._connect()
+            try:
+                conn.request(method, self._prefix + path, body=body, headers=hdrs)
+                return conn.getresponse()
+            except (http.client.RemoteDisconnected, ConnectionResetError,
+                    BrokenPipeError):
+                self.close()
+                if attempt or not replayable:
+                    raise
+            except Exception:
+                self.close()
+                raise
+
+    def request(self, method, path, data=None, token=None):
+        """
+        Send a request and return (status, parsed_json). Never raises on
+        HTTP error statuses.
+        """
+        resp = self.open(method, path, data=data, token=token)
+        try:
+            raw = resp.read()
+        except Exception:
+            # A half-read response would leave the connection unusable
+            self.close()
+            raise
+        try:
+            parsed = json.loads(raw) if raw else None
+        except ValueError:
+            parsed = {"message": raw[:200].decode("utf-8", "replace")}
+        return resp.status, parsed
+
+
+def pb_stream_list(path, token=None, base_url=None):
+    """
+    GET a list endpoint and decode it incrementally.
+
+    Returns:
+        ListStream — iterate it for records; ``meta`` holds page metadata.
+
+    Raises:
+        PBRequestError on HTTP errors.
+    """
+    base_url = base_url or PB_URL
+    req = urllib.request.Request(base_url + path, method="GET")
+    if token:
+        req.add_header("Authorization", token)
+    try:
+        resp = urllib.request.urlopen(req)
+    except urllib.error.HTTPError as e:
+        try:
+            parsed = json.loads(e.read())
+        except Exception:
+            parsed = {"message": str(e)}
+        raise PBRequestError(e.code, parsed)
+    return ListStream(resp)
+
+
+# ---------------------------------------------------------------------------
+# Record / replay cassettes
+# ---------------------------------------------------------------------------
+
+class PBCassetteError(Exception):
+    """Raised in strict replay mode when a request has no recorded response."""
+
+
+class Cassette:
+    """
+    Recorded request/response pairs for pb_request.
+
+    Requests are matched on method, path and JSON body after normalisation:
+    timestamps, epoch-like numbers, client-supplied ids and passwords are
+    replaced by placeholders, and the Authorization header is ignored.
+    Tokens in recorded responses are replaced too, so cassettes hold no
+    secrets. Repeated identical requests replay their responses in order;
+    once exhausted the last response is repeated.
+    """
+
+    _DATETIME = re.compile(r"\d{4}-\d{2}-\d{2}[ T]\d{2}:\d{2}:\d{2}(?:\.\d+)?Z?")
+    _EPOCH = re.compile(r"(?<!\d)\d{10,13}(?!\d)")
+    _SECRET_KEYS = {"password", "passwordConfirm", "oldPassword"}
+
+    def __init__(self, path, mode="replay", strict=False):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Unknown cassette mode: {mode}")
+        self.path = path
+        self.mode = mode
+        self.strict = strict
+        self._lock = threading.Lock()
+        self._interactions = []
+        self._index = {}
+        if mode == "replay":
+            with open(path, "r") as f:
+                self._interactions = json.load(f)["interactions"]
+            for item in self._interactions:
+                self._index.setdefault(item["key"], []).append(item["response"])
+            self._cursor = {k: 0 for k in self._index}
+
+    def _normalize(self, value, key=None):
+        if isinstance(value, dict):
+            return {k: self._normalize(v, k) for k, v in value.items()}
+        if isinstance(value, list):
+            return [self._normalize(v) for v in value]
+        if key in self._SECRET_KEYS:
+            return "<secret>"
+        if key == "id" and isinstance(value, str):
+            return "<id>"
+        if isinstance(value, str):
+            return self._EPOCH.sub("<n>", self._DATETIME.sub("<ts>", value))
+        return value
+
+    def _key(self, method, path, data):
+        path = urllib.parse.unquote(path)
+        path = self._EPOCH.sub("<n>", self._DATETIME.sub("<ts>", path))
+        return json.dumps([method.upper(), path, self._normalize(data)],
+                          sort_keys=True, ensure_ascii=False)
+
+    def _scrub(self, value):
+        if isinstance(value, dict):
+            return {k: "<token>" if k == "token" and isinstance(v, str) else self._scrub(v)
+                    for k, v in value.items()}
+        if isinstance(value, list):
+            return [self._scrub(v) for v in value]
+        return value
+
+    def lookup(self, method, path, data):
+        """Return (status, body) for a recorded request, or None."""
+        key = self._key(method, path, data)
+        with self._lock:
+            responses = self._index.get(key)
+            if not responses:
+                if self.strict:
+                    raise PBCassetteError(f"No recorded response for {method} {path}")
+                return None
+            i = self._cursor[key]
+            self._cursor[key] = min(i + 1, len(responses) - 1)
+        return responses[i]["status"], responses[i]["body"]
+
+    def record(self, method, path, data, status, body):
+        with self._lock:
+            self._interactions.append({
+                "key": self._key(method, path, data),
+                "request": {"method": method.upper(), "path": path,
+                            "body": self._normalize(data)},
+                "response": {"status": status, "body": self._scrub(body)},
+            })
+
+    def save(self):
+        if self.mode != "record":
+            return
+        with self._lock:
+            with open(self.path, "w") as f:
+                json.dump({"version": 1, "interactions": self._interactions},
+                          f, indent=1, ensure_ascii=False)
+
+
+_cassette = None
+
+
+def use_cassette(path, mode="replay", strict=False):
+    """
+    Route pb_request through a cassette file.
+
+    mode="record" performs live requests and saves them to ``path`` at exit;
+    mode="replay" serves recorded responses from memory without network I/O,
+    falling back to live requests for unmatched ones unless ``strict``.
+    Pass path=None to turn cassettes off.
+
+    Returns:
+        The active Cassette (or None).
+    """
+    global _cassette
+    if _cassette is not None:
+        _cassette.save()
+    _cassette = Cassette(path, mode, strict) if path else None
+    return _cassette
+
+
+@atexit.register
+def _save_cassette():
+    if _cassette is not None:
+        _cassette.save()
+
+
+# PB_CASSETTE (+ PB_CASSETTE_MODE=record|replay, PB_CASSETTE_STRICT=1) turns
+# on record/replay for every script without code changes.
+if os.environ.get("PB_CASSETTE"):
+    use_cassette(os.environ["PB_CASSETTE"],
+                 os.environ.get("PB_CASSETTE_MODE", "replay"),
+                 os.environ.get("PB_CASSETTE_STRICT", "") not in ("", "0", "false"))
+
 
 # ---------------------------------------------------------------------------
 # Authentication
 # ---------------------------------------------------------------------------
 
-_cached_token = None
+_token_cache = {}
+_token_locks = {}
+_token_locks_guard = threading.Lock()
 
 
-def get_superuser_token(force=False):
+def get_superuser_token(force=False, target=None):
     """
     Authenticate as superuser and return the bearer token string.
-    Caches the token for subsequent calls unless force=True.
+    Caches the token per (url, email) for subsequent calls unless force=True.
+
+    Args:
+        target: Target profile dict from get_target(); None for the default.
     """
-    global _cached_token
-    if _cached_token and not force:
-        return _cached_token
+    target = target or get_target()
+    key = (target["url"], target["email"])
+    with _token_locks_guard:
+        lock = _token_locks.setdefault(key, threading.Lock())
+    with lock:
+        if key in _token_cache and not force:
+            return _token_cache[key]
 
-    if not PB_SUPERUSER_EMAIL or not PB_SUPERUSER_PASSWORD:
-        print_result(False, 0, {
-            "message": "PB_SUPERUSER_EMAIL and PB_SUPERUSER_PASSWORD must be set"
-        })
-        sys.exit(1)
+        if not target["email"] or not target["password"]:
+            if target.get("name"):
+                message = (f"Target '{target['name']}' has no superuser credentials "
+                           "(set email and password in its profile, or "
+                           "PB_SUPERUSER_EMAIL and PB_SUPERUSER_PASSWORD)")
+            else:
+                message = "PB_SUPERUSER_EMAIL and PB_SUPERUSER_PASSWORD must be set"
+            print_result(False, 0, {"message": message})
+            sys.exit(1)
 
-    try:
-        result = pb_request("POST",
-            "/api/collections/_superusers/auth-with-password",
-            {"identity": PB_SUPERUSER_EMAIL, "password": PB_SUPERUSER_PASSWORD})
-        _cached_token = result["token"]
-        return _cached_token
-    except PBRequestError as e:
-        print_result(False, e.status, e.data)
-        sys.exit(1)
+        try:
+            result = pb_request("POST",
+                "/api/collections/_superusers/auth-with-password",
+                {"identity": target["email"], "password": target["password"]},
+                base_url=target["url"])
+            _token_cache[key] = result["token"]
+            return _token_cache[key]
+        except PBRequestError as e:
+            print_result(False, e.status, e.data)
+            sys.exit(1)
 
 
-def pb_authed_request(method, path, data=None, raw_response=False):
+def pb_authed_request(method, path, data=None, raw_response=False, target=None):
     """
     Like pb_request but automatically authenticates as superuser.
     On 401, retries once with a fresh token.
+
+    Args:
+        target: Target profile dict from get_target(); None for the default.
     """
-    token = get_superuser_token()
+    base_url = target["url"] if target else None
+    token = get_superuser_token(target=target)
     try:
         return pb_request(method, path, data=data, token=token,
-                          raw_response=raw_response)
+                          raw_response=raw_response, base_url=base_url)
     except PBRequestError as e:
         if e.status == 401:
-            token = get_superuser_token(force=True)
+            token = get_superuser_token(force=True, target=target)
             return pb_request(method, path, data=data, token=token,
-                              raw_response=raw_response)
+                              raw_response=raw_response, base_url=base_url)
         raise
 
 
+def pb_authed_stream_list(path, target=None):
+    """Like pb_stream_list but authenticates as superuser (retries once on 401)."""
+    base_url = target["url"] if target else None
+    try:
+        return pb_stream_list(path, token=get_superuser_token(target=target),
+                              base_url=base_url)
+    except PBRequestError as e:
+        if e.status != 401:
+            raise
+        return pb_stream_list(path, token=get_superuser_token(force=True, target=target),
+                              base_url=base_url)
+
+
 # ---------------------------------------------------------------------------
 # Output helper
 # ---------------------------------------------------------------------------
@@ -168,3 +669,16 @@ def print_result(success, status, data):
     """Print structured JSON result to stdout."""
     print(json.dumps({"success": success, "status": status, "data": data},
                      indent=2, ensure_ascii=False))
+
+
+# ---------------------------------------------------------------------------
+# Target selection
+# ---------------------------------------------------------------------------
+
+# PB_TARGET selects a profile for the whole process (used by pb_fanout.py
+# and handy for one-off runs against a named instance).
+if os.environ.get("PB_TARGET"):
+    _profile = get_target(os.environ["PB_TARGET"])
+    PB_URL = _profile["url"]
+    PB_SUPERUSER_EMAIL = _profile["email"]
+    PB_SUPERUSER_PASSWORD = _profile["password"]
@@ -8,9 +8,19 @@ Usage (see references/e2e-testing.md for path setup):
     from pb_e2e_helpers import TestRunner, req, user_login, create_test_user, ...
 """
 
+import http.client
+import json
+import os
+import statistics
+import threading
+import time
 import urllib.parse
 
-from pb_config import pb_request, pb_authed_request, PBRequestError
+from pb_config import (
+    pb_request, pb_authed_request, PBRequestError,
+    add_request_listener, remove_request_listener,
+)
+from pb_records import get_many
 
 
 # ---------------------------------------------------------------------------
@@ -18,43 +28,126 @@ from pb_config import pb_request, pb_authed_request, PBRequestError
 # ---------------------------------------------------------------------------
 
 class TestRunner:
-    """Simple test runner that tracks pass/fail counts."""
+    """
+    Simple test runner that tracks pass/fail counts.
+
+    Every request made through pb_request between two results is timed and
+    attributed to the next ok/fail/check. Checks can carry a latency budget
+    (per check, or per section), and with ``baseline`` set, timings are
+    compared against the median of previous runs stored in that file.
+    """
 
-    def __init__(self, title):
+    BASELINE_SAMPLES = 5
+
+    def __init__(self, title, baseline=None, regression_threshold=1.5,
+                 min_regression_ms=5.0, fail_on_regression=False,
+                 update_baseline=None):
         self.title = title
         self.passed = 0
         self.failed = 0
+        self.timings = {}
+        self.regressions = []
+        self.baseline_path = baseline or os.environ.get("PB_LATENCY_BASELINE")
+        self.regression_threshold = regression_threshold
+        self.min_regression_ms = min_regression_ms
+        self.fail_on_regression = fail_on_regression
+        if update_baseline is None:
+            update_baseline = os.environ.get("PB_LATENCY_UPDATE", "") not in ("", "0")
+        self.update_baseline = update_baseline
+        self._baseline = self._load_baseline()
+        self._section = None
+        self._section_budget = None
+        self._pending = []
+        self._lock = threading.Lock()
+        add_request_listener(self._on_request)
         print("=" * 60)
         print(title)
         print("=" * 60)
 
-    def ok(self, label):
+    def _load_baseline(self):
+        if not self.baseline_path or not os.path.isfile(self.baseline_path):
+            return {}
+        with open(self.baseline_path, "r") as f:
+            return json.load(f).get("checks", {})
+
+    def _on_request(self, method, path, status, elapsed):
+        with self._lock:
+            self._pending.append(elapsed)
+
+    def _take_latency(self):
+        """Total request time (ms) since the previous result, or None."""
+        with self._lock:
+            pending, self._pending = self._pending, []
+        return sum(pending) * 1000 if pending else None
+
+    def _record(self, passed, label, detail, budget_ms):
+        ms = self._take_latency()
+        key = f"{self._section} / {label}" if self._section else label
+        budget_ms = budget_ms if budget_ms is not None else self._section_budget
+        if ms is not None:
+            self.timings[key] = ms
+            if passed and budget_ms is not None and ms > budget_ms:
+                passed = False
+                detail = f"latency {ms:.1f} ms > budget {budget_ms:g} ms"
+            base = self._baseline.get(key, {}).get("median")
+            if base is not None and ms > base * self.regression_threshold \
+                    and ms - base > self.min_regression_ms:
+                self.regressions.append((key, base, ms))
+                if self.fail_on_regression and passed:
+                    passed = False
+                    detail = f"latency {ms:.1f} ms regressed from {base:.1f} ms"
+        timing = f" ({ms:.1f} ms)" if ms is not None else ""
+        if passed:
+            self.passed += 1
+            print(f"  \u2713 {label}{timing}")
+        else:
+            self.failed += 1
+            suffix = f": {detail}" if detail else ""
+            print(f"  \u2717 {label}{timing}{suffix}")
+
+    def ok(self, label, budget_ms=None):
         """Record a passing test."""
-        self.passed += 1
-        print(f"  \u2713 {label}")
+        self._record(True, label, "", budget_ms)
 
     def fail(self, label, detail=""):
         """Record a failing test."""
-        self.failed += 1
-        suffix = f": {detail}" if detail else ""
-        print(f"  \u2717 {label}{suffix}")
-
-    def check(self, label, condition, detail=""):
-        """Assert a condition — records pass or fail."""
-        if condition:
-            self.ok(label)
-        else:
-            self.fail(label, detail)
+        self._record(False, label, detail, None)
+
+    def check(self, label, condition, detail="", budget_ms=None):
+        """Assert a condition (and optional latency budget) — records pass or fail."""
+        self._record(bool(condition), label, detail, budget_ms)
 
-    def section(self, title):
-        """Print a section header."""
+    def section(self, title, budget_ms=None):
+        """Print a section header. ``budget_ms`` applies to its checks."""
+        self._take_latency()
+        self._section = title
+        self._section_budget = budget_ms
         print(f"\n--- {title} ---")
 
+    def _save_baseline(self):
+        checks = dict(self._baseline)
+        for key, ms in self.timings.items():
+            samples = (checks.get(key, {}).get("samples", []) + [round(ms, 2)])
+            samples = samples[-self.BASELINE_SAMPLES:]
+            checks[key] = {"samples": samples, "median": statistics.median(samples)}
+        with open(self.baseline_path, "w") as f:
+            json.dump({"checks": checks}, f, indent=2, sort_keys=True)
+
     def summary(self):
         """Print results and return exit code (0=pass, 1=fail)."""
+        remove_request_listener(self._on_request)
         print("\n" + "=" * 60)
         print(f"Results: {self.passed} passed, {self.failed} failed")
+        if self.regressions:
+            worst = sorted(self.regressions, key=lambda r: r[2] / max(r[1], 0.001),
+                           reverse=True)
+            print(f"Latency regressions: {len(worst)}")
+            for key, base, ms in worst[:5]:
+                print(f"  {key}: {base:.1f} ms -> {ms:.1f} ms ({ms / max(base, 0.001):.1f}x)")
         print("=" * 60)
+        if self.baseline_path and self.timings and \
+                (self.update_baseline or not os.path.isfile(self.baseline_path)):
+            self._save_baseline()
         return 0 if self.failed == 0 else 1
 
 
@@ -183,6 +276,20 @@ def superuser_get(collection, record_id):
         return e.status, e.data
 
 
+def superuser_get_many(collection, record_ids):
+    """
+    GET many records as superuser with coalesced id-filter queries.
+
+    Returns:
+        (status, records) — records is aligned with record_ids: record
+        dict, or None if not found.
+    """
+    try:
+        return 200, get_many(collection, record_ids)
+    except PBRequestError as e:
+        return e.status, e.data
+
+
 def superuser_list(collection, filter_expr=None):
     """
     List records as superuser.
@@ -198,3 +305,138 @@ def superuser_list(collection, filter_expr=None):
         return 200, data
     except PBRequestError as e:
         return e.status, e.data
+
+
+# ---------------------------------------------------------------------------
+# Snapshot-based reset
+# ---------------------------------------------------------------------------
+
+def _healthy():
+    try:
+        status, _ = pb_request("GET", "/api/health", raw_response=True)
+        return status == 200
+    except (OSError, http.client.HTTPException):
+        return False
+
+
+def wait_for_server(timeout=60, initial_delay=0.1, max_delay=2.0):
+    """
+    Poll /api/health with exponential backoff until it answers 200.
+
+    Returns:
+        Seconds waited.
+    """
+    started = time.monotonic()
+    delay = initial_delay
+    while not _healthy():
+        if time.monotonic() - started > timeout:
+            raise RuntimeError(f"PocketBase did not come back within {timeout}s")
+        time.sleep(delay)
+        delay = min(delay * 2, max_delay)
+    return time.monotonic() - started
+
+
+class DBSnapshot:
+    """
+    Seeded database state captured with the backups API and restored
+    between test groups — faster than deleting records one by one as
+    fixtures grow, and also removes records created by hooks.
+
+    Restoring restarts the PocketBase process, so the server must run under
+    `serve` (or a supervisor) that survives the restart.
+    """
+
+    def __init__(self, name="e2e_snapshot.zip", seed=None):
+        self.name = name
+        self.seed = seed
+        self.reset_times = []
+
+    def exists(self):
+        backups = pb_authed_request("GET", "/api/backups") or []
+        return any(b.get("key") == self.name for b in backups)
+
+    def ensure(self, rebuild=False, timeout=120):
+        """Run the seed function and capture the snapshot, unless it exists."""
+        if not rebuild and self.exists():
+            return self
+        if rebuild and self.exists():
+            self.delete()
+        if self.seed:
+            self.seed()
+        pb_authed_request("POST", "/api/backups", {"name": self.name})
+        started = time.monotonic()
+        while not self.exists():
+            if time.monotonic() - started > timeout:
+                raise RuntimeError(f"Backup {self.name} was not created within {timeout}s")
+            time.sleep(0.2)
+        return self
+
+    def _marker_present(self, marker):
+        """True/False once the server answers, None while it is unreachable."""
+        try:
+            pb_authed_request("GET", f"/api/collections/{marker}")
+            return True
+        except PBRequestError as e:
+            return False if e.status == 404 else None
+        except (OSError, http.client.HTTPException):
+            return None
+
+    def reset(self, timeout=120):
+        """
+        Restore the snapshot and wait until the restored data is served.
+
+        The restore endpoint answers before the archive is unpacked and the
+        server restarts, and how long that takes grows with the database, so
+        health alone can't tell old data from new. An empty marker
+        collection is created first; it is not in the snapshot, so the reset
+        is done once the server is healthy and the marker is gone.
+
+        Returns:
+            Seconds the reset took.
+
+        Raises:
+            RuntimeError: if the restore is not observed within ``timeout``.
+        """
+        marker = "e2e_reset_" + os.urandom(6).hex()
+        pb_authed_request("POST", "/api/collections", {"name": marker, "type": "base"})
+        started = time.monotonic()
+        try:
+            pb_authed_request("POST", f"/api/backups/{self.name}/restore")
+        except PBRequestError:
+            pb_authed_request("DELETE", f"/api/collections/{marker}")
+            raise
+        delay = 0.1
+        while True:
+            if self._marker_present(marker) is False and _healthy():
+                break
+            if time.monotonic() - started > timeout:
+                try:
+                    pb_authed_request("DELETE", f"/api/collections/{marker}")
+                except (PBRequestError, OSError, http.client.HTTPException):
+                    pass
+                raise RuntimeError(
+                    f"Restore of {self.name} was not observed within {timeout}s")
+            time.sleep(delay)
+            delay = min(delay * 2, 1.0)
+        elapsed = time.monotonic() - started
+        self.reset_times.append(elapsed)
+        return elapsed
+
+    def delete(self):
+        """Delete the snapshot backup. Ignores 404."""
+        try:
+            pb_authed_request("DELETE", f"/api/backups/{self.name}")
+        except PBRequestError:
+            pass
+
+
+def seeded_snapshot(seed, name="e2e_snapshot.zip", rebuild=False):
+    """
+    Build the seeded state once and return a DBSnapshot for resets.
+
+    Usage:
+        snap = seeded_snapshot(create_fixtures)
+        ...tests...
+        print(f"reset in {snap.reset():.2f}s")
+    """
+    return DBSnapshot(name, seed).ensure(rebuild=rebuild)
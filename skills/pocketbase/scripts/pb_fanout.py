@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Run any PB script against many named targets concurrently.
+
+Targets are read once from pb_targets.json (or PB_TARGETS_FILE) and each
+run gets its own process with that target's URL and credentials.
+
+Usage:
+  python scripts/pb_fanout.py --all pb_health.py
+  python scripts/pb_fanout.py --targets tenant-a,tenant-b pb_collections.py sync --file collections.json
+  python scripts/pb_fanout.py --all --workers 16 --timeout 60 pb_backups.py create
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from pb_config import load_targets, print_result
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def _parse_output(stdout):
+    """Collect every JSON object printed by a script.
+
+    Scripts print indented print_result() blocks, sometimes mixed with plain
+    progress lines (e.g. pb_health.py).
+    """
+    decoder = json.JSONDecoder()
+    results = []
+    pos = 0
+    while True:
+        start = stdout.find("{", pos)
+        if start == -1:
+            break
+        try:
+            obj, pos = decoder.raw_decode(stdout, start)
+            results.append(obj)
+        except json.JSONDecodeError:
+            pos = start + 1
+    if len(results) == 1:
+        return results[0]
+    return results
+
+
+def run_on_target(target, script, script_args, timeout):
+    """Run one script invocation with the target's environment."""
+    env = dict(os.environ)
+    env.pop("PB_TARGET", None)
+    env["PB_URL"] = target["url"]
+    env["PB_SUPERUSER_EMAIL"] = target["email"]
+    env["PB_SUPERUSER_PASSWORD"] = target["password"]
+
+    started = time.monotonic()
+    try:
+        proc = subprocess.run(
+            [sys.executable, script] + script_args,
+            env=env, capture_output=True, text=True, timeout=timeout)
+    except subprocess.TimeoutExpired:
+        return {
+            "success": False,
+            "exitCode": None,
+            "elapsedMs": round((time.monotonic() - started) * 1000),
+            "message": f"Timed out after {timeout}s",
+        }
+    result = {
+        "success": proc.returncode == 0,
+        "exitCode": proc.returncode,
+        "elapsedMs": round((time.monotonic() - started) * 1000),
+        "result": _parse_output(proc.stdout),
+    }
+    if proc.returncode != 0 and proc.stderr:
+        result["stderr"] = proc.stderr[-2000:]
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Run a PB script against many targets concurrently")
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument("--targets", help="Comma-separated target names")
+    group.add_argument("--all", action="store_true", help="Use every target")
+    parser.add_argument("--workers", type=int, default=8,
+                        help="Max concurrent targets (default: 8)")
+    parser.add_argument("--timeout", type=float, default=120,
+                        help="Per-target timeout in seconds (default: 120)")
+    parser.add_argument("script", help="Script name (e.g. pb_health.py)")
+    parser.add_argument("script_args", nargs=argparse.REMAINDER,
+                        help="Arguments passed to the script")
+    args = parser.parse_args()
+
+    targets = load_targets()
+    if not targets:
+        print_result(False, 0, {"message": "No targets defined (pb_targets.json or PB_TARGETS_FILE)"})
+        sys.exit(1)
+    names = list(targets) if args.all else [n.strip() for n in args.targets.split(",") if n.strip()]
+    unknown = [n for n in names if n not in targets]
+    if unknown:
+        print_result(False, 0, {"message": f"Unknown target(s): {', '.join(unknown)}"})
+        sys.exit(1)
+
+    script = args.script
+    if not os.path.isfile(script):
+        script = os.path.join(SCRIPTS_DIR, args.script)
+    if not os.path.isfile(script):
+        print_result(False, 0, {"message": f"Script not found: {args.script}"})
+        sys.exit(1)
+
+    with ThreadPoolExecutor(max_workers=max(1, args.workers)) as pool:
+        futures = {name: pool.submit(run_on_target, targets[name], script,
+                                     args.script_args, args.timeout)
+                   for name in names}
+        results = {name: fut.result() for name, fut in futures.items()}
+
+    failed = [n for n, r in results.items() if not r["success"]]
+    print_result(not failed, 200 if not failed else 0, {
+        "targets": len(names),
+        "failed": failed,
+        "results": results,
+    })
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,31 @@
 #!/usr/bin/env python3
-"""PocketBase health check and connectivity test."""
+"""
+PocketBase health check and connectivity test.
 
+Usage:
+  python scripts/pb_health.py
+  python scripts/pb_health.py --watch [--interval 10] [--collections posts,users]
+  python scripts/pb_health.py --watch --prometheus 9464
+"""
+
+import argparse
+import collections
+import json
+import math
 import sys
 import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from pb_config import (
     PB_URL, PB_SUPERUSER_EMAIL, PB_SUPERUSER_PASSWORD,
-    pb_request, get_superuser_token, print_result, PBRequestError,
+    PBConnection, pb_request, get_superuser_token, print_result, PBRequestError,
 )
 
 
-def main():
+def check_once():
     # 1. Health endpoint
     print(f"Checking PocketBase at {PB_URL} ...")
     try:
@@ -42,5 +56,174 @@ def main():
         print("\nSkipping superuser auth test (credentials not set).")
 
 
+# ---------------------------------------------------------------------------
+# Monitoring mode
+# ---------------------------------------------------------------------------
+
+class ProbeStats:
+    """Rolling latency window plus cumulative counters for one probe."""
+
+    def __init__(self, window):
+        self.samples = collections.deque(maxlen=window)
+        self.count = 0
+        self.errors = 0
+        self.latency_sum = 0.0
+        self.up = 0
+        self.last_status = None
+
+    def record(self, latency, ok, status):
+        self.samples.append(latency)
+        self.count += 1
+        self.latency_sum += latency
+        self.up = 1 if ok else 0
+        self.last_status = status
+        if not ok:
+            self.errors += 1
+
+    def quantile(self, q):
+        """Nearest-rank quantile over the rolling window (seconds)."""
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        idx = min(len(ordered) - 1, max(0, math.ceil(q * len(ordered)) - 1))
+        return ordered[idx]
+
+    def snapshot(self):
+        def ms(v):
+            return None if v is None else round(v * 1000, 2)
+        return {
+            "up": self.up,
+            "status": self.last_status,
+            "latencyMs": ms(self.samples[-1]) if self.samples else None,
+            "p50": ms(self.quantile(0.50)),
+            "p95": ms(self.quantile(0.95)),
+            "p99": ms(self.quantile(0.99)),
+            "count": self.count,
+            "errors": self.errors,
+        }
+
+
+def _prometheus_text(stats):
+    lines = [
+        "# HELP pb_probe_latency_seconds Probe latency over the rolling window.",
+        "# TYPE pb_probe_latency_seconds summary",
+    ]
+    for name, st in stats.items():
+        for q in (0.5, 0.95, 0.99):
+            value = st.quantile(q)
+            if value is not None:
+                lines.append(
+                    f'pb_probe_latency_seconds{{probe="{name}",quantile="{q}"}} {value:.6f}')
+        lines.append(f'pb_probe_latency_seconds_sum{{probe="{name}"}} {st.latency_sum:.6f}')
+        lines.append(f'pb_probe_latency_seconds_count{{probe="{name}"}} {st.count}')
+    lines += [
+        "# HELP pb_probe_errors_total Failed probes since start.",
+        "# TYPE pb_probe_errors_total counter",
+    ]
+    lines += [f'pb_probe_errors_total{{probe="{n}"}} {st.errors}' for n, st in stats.items()]
+    lines += [
+        "# HELP pb_probe_up Whether the last probe succeeded.",
+        "# TYPE pb_probe_up gauge",
+    ]
+    lines += [f'pb_probe_up{{probe="{n}"}} {st.up}' for n, st in stats.items()]
+    return "\n".join(lines) + "\n"
+
+
+def _serve_prometheus(port, stats, lock):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] not in ("/", "/metrics"):
+                self.send_error(404)
+                return
+            with lock:
+                body = _prometheus_text(stats).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def _probe(conn, path, token=None):
+    """Run one request and return (latency_seconds, ok, status)."""
+    started = time.perf_counter()
+    try:
+        status, _ = conn.request("GET", path, token=token)
+    except Exception:
+        return time.perf_counter() - started, False, 0
+    return time.perf_counter() - started, 200 <= status < 300, status
+
+
+def monitor(args):
+    probes = {"health": "/api/health"}
+    for name in filter(None, (c.strip() for c in (args.collections or "").split(","))):
+        probes[f"list:{name}"] = f"/api/collections/{name}/records?perPage=1&skipTotal=1"
+    token = get_superuser_token() if len(probes) > 1 else None
+
+    stats = {name: ProbeStats(args.window) for name in probes}
+    lock = threading.Lock()
+    if args.prometheus:
+        _serve_prometheus(args.prometheus, stats, lock)
+    ndjson = args.ndjson or not args.prometheus
+
+    conn = PBConnection(timeout=args.timeout)
+    iteration = 0
+    try:
+        while args.count is None or iteration < args.count:
+            iteration += 1
+            started = time.monotonic()
+            for name, path in probes.items():
+                use_token = token if name != "health" else None
+                result = _probe(conn, path, use_token)
+                if result[2] == 401 and use_token:
+                    token = get_superuser_token(force=True)
+                    result = _probe(conn, path, token)
+                with lock:
+                    stats[name].record(*result)
+            if ndjson:
+                with lock:
+                    line = {"ts": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                            "probes": {n: st.snapshot() for n, st in stats.items()}}
+                print(json.dumps(line), flush=True)
+            if args.count is None or iteration < args.count:
+                time.sleep(max(0.0, args.interval - (time.monotonic() - started)))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PocketBase health check")
+    parser.add_argument("--watch", action="store_true",
+                        help="Probe continuously and report latency statistics")
+    parser.add_argument("--interval", type=float, default=10,
+                        help="Seconds between probe rounds (default: 10)")
+    parser.add_argument("--count", type=int, help="Stop after N probe rounds")
+    parser.add_argument("--collections",
+                        help="Comma-separated collections to probe with a 1-row list query")
+    parser.add_argument("--window", type=int, default=300,
+                        help="Samples kept for rolling percentiles (default: 300)")
+    parser.add_argument("--timeout", type=float, default=10,
+                        help="Per-request timeout in seconds (default: 10)")
+    parser.add_argument("--ndjson", action="store_true",
+                        help="Print one JSON line per round (default unless --prometheus)")
+    parser.add_argument("--prometheus", type=int, metavar="PORT",
+                        help="Serve Prometheus metrics on 127.0.0.1:PORT/metrics")
+    args = parser.parse_args()
+
+    if args.watch:
+        monitor(args)
+    else:
+        check_once()
+
+
 if __name__ == "__main__":
     main()
@@ -5,20 +5,42 @@ PocketBase record management.
 Usage:
   python scripts/pb_records.py list <collection> [--filter "..."] [--sort "..."] [--expand "..."] [--page N] [--perPage N]
   python scripts/pb_records.py get <collection> <record_id>
+  python scripts/pb_records.py get-many <collection> <id> [<id> ...] [--file ids.txt]
   python scripts/pb_records.py create <collection> '<json>'
   python scripts/pb_records.py create <collection> --file data.json
   python scripts/pb_records.py update <collection> <record_id> '<json>'
   python scripts/pb_records.py update <collection> <record_id> --file data.json
   python scripts/pb_records.py delete <collection> <record_id>
+  python scripts/pb_records.py upsert <collection> --key field[,field] --file rows.ndjson
+  python scripts/pb_records.py export <collection> [--filter "..."] [--fields "..."] [--perPage 500] [--out records.ndjson]
+  python scripts/pb_records.py warm-thumbs <collection> [--field f] [--since "2024-01-01 00:00:00"] [--concurrency 8] [--rate 50]
+  python scripts/pb_records.py aggregate <collection> [--group-by f] [--agg count,sum:x,avg:y,min:z,max:z] [--filter "..."]
+  python scripts/pb_records.py copy <collection> --from staging --to production [--files] [--checkpoint copy.json]
+  python scripts/pb_records.py export <collection> --shards 8 --workers 4 --out-dir export/ [--partition created|id] [--format ndjson|csv] [--gzip]
 """
 
 import argparse
+import csv
+import datetime
+import gzip
+import hashlib
+import io
 import json
+import multiprocessing
 import sys
 import os
+import queue
+import re
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from pb_config import pb_authed_request, print_result, PBRequestError
+from pb_config import (
+    PBConnection, get_superuser_token, get_target, pb_authed_request,
+    pb_authed_stream_list, print_result, PBRequestError,
+)
+from pb_validate import error_response, get_validator
 
 
 def _encode(value):
@@ -66,6 +88,1164 @@ def _get_body(args):
     sys.exit(1)
 
 
+def _quote(value):
+    """Quote a string literal for a PocketBase filter expression."""
+    return '"' + str(value).replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+# PocketBase silently caps perPage at this value.
+MAX_PER_PAGE = 1000
+
+
+def per_page_arg(value):
+    """argparse type for --perPage: 1..MAX_PER_PAGE."""
+    number = int(value)
+    if not 0 < number <= MAX_PER_PAGE:
+        raise argparse.ArgumentTypeError(f"must be between 1 and {MAX_PER_PAGE}")
+    return number
+
+
+def iter_records(collection, filter_expr=None, fields=None, expand=None,
+                 per_page=500, target=None, after=None):
+    """
+    Yield every matching record using id-cursor paging.
+
+    Pages are requested sorted by id with ``id > last`` appended to the
+    filter and ``skipTotal`` set, so no COUNT(*) runs and rows inserted
+    during the scan cannot shift page boundaries. Each page is decoded
+    incrementally (see pb_config.ListStream), so only one record is held
+    at a time even for full 1000-item pages of large records. ``per_page``
+    is clamped to MAX_PER_PAGE, and a page is only treated as the last one
+    when it is shorter than the ``perPage`` the server reports.
+    ``after`` resumes after a known id.
+    """
+    if fields and "id" not in [f.strip() for f in fields.split(",")]:
+        fields = "id," + fields
+    per_page = max(1, min(per_page, MAX_PER_PAGE))
+    last_id = after
+    while True:
+        parts = []
+        if filter_expr:
+            parts.append(f"({filter_expr})")
+        if last_id is not None:
+            parts.append(f"id > {_quote(last_id)}")
+        params = [f"perPage={per_page}", "sort=id", "skipTotal=1"]
+        if parts:
+            params.append(f"filter={_encode(' && '.join(parts))}")
+        if fields:
+            params.append(f"fields={_encode(fields)}")
+        if expand:
+            params.append(f"expand={_encode(expand)}")
+        path = f"/api/collections/{collection}/records?" + "&".join(params)
+        count = 0
+        with pb_authed_stream_list(path, target=target) as page:
+            for record in page:
+                count += 1
+                last_id = record["id"]
+                yield record
+            limit = page.meta.get("perPage") or per_page
+        if count == 0 or count < limit:
+            return
+
+
+# ---------------------------------------------------------------------------
+# Coalesced lookups
+# ---------------------------------------------------------------------------
+
+# Stay well below common proxy/server URL limits (8 KB).
+MAX_URL_LENGTH = 4000
+MAX_IDS_PER_QUERY = 500
+
+_inflight = {}
+_inflight_lock = threading.Lock()
+
+
+def chunk_or_filters(items, term, base_len, max_len=MAX_URL_LENGTH,
+                     max_terms=MAX_IDS_PER_QUERY):
+    """
+    Group items into ``t1 || t2 || ...`` filters, where ``term(item)`` builds
+    one filter term, keeping each request URL under ``max_len`` characters.
+
+    Returns:
+        List of (items, filter_expr) tuples.
+    """
+    sep_len = len(_encode(" || "))
+    chunks, current, terms, length = [], [], [], base_len
+    for item in items:
+        t = term(item)
+        t_len = len(_encode(t))
+        if current and (length + sep_len + t_len > max_len or len(current) >= max_terms):
+            chunks.append((current, " || ".join(terms)))
+            current, terms, length = [], [], base_len
+        length += t_len + (sep_len if current else 0)
+        current.append(item)
+        terms.append(t)
+    if current:
+        chunks.append((current, " || ".join(terms)))
+    return chunks
+
+
+def _fetch_id_chunk(collection, filter_expr, size, fields, expand, target):
+    params = [f"perPage={size}", "skipTotal=1", f"filter={_encode(filter_expr)}"]
+    if fields:
+        params.append(f"fields={_encode(fields)}")
+    if expand:
+        params.append(f"expand={_encode(expand)}")
+    data = pb_authed_request(
+        "GET", f"/api/collections/{collection}/records?" + "&".join(params),
+        target=target)
+    return {r["id"]: r for r in data.get("items", [])}
+
+
+def get_many(collection, ids, fields=None, expand=None, workers=4, target=None):
+    """
+    Fetch many records by id with as few requests as possible.
+
+    Ids are de-duplicated and coalesced into ``id="a" || id="b"`` filter
+    queries sized to stay under URL limits, which run concurrently.
+    Concurrent callers in the same process asking for the same id share one
+    in-flight request (single-flight).
+
+    Returns:
+        List aligned with ``ids``: the record dict, or None if not found.
+    """
+    if fields and "id" not in [f.strip() for f in fields.split(",")]:
+        fields = "id," + fields
+    scope = (target["url"] if target else None, collection, fields, expand)
+
+    futures, mine = {}, []
+    with _inflight_lock:
+        for record_id in dict.fromkeys(ids):
+            key = scope + (record_id,)
+            fut = _inflight.get(key)
+            if fut is None:
+                fut = _inflight[key] = Future()
+                mine.append(record_id)
+            futures[record_id] = fut
+
+    def run(chunk):
+        chunk_ids, filter_expr = chunk
+        try:
+            found = _fetch_id_chunk(collection, filter_expr, len(chunk_ids),
+                                    fields, expand, target)
+        except BaseException as e:
+            for record_id in chunk_ids:
+                futures[record_id].set_exception(e)
+        else:
+            for record_id in chunk_ids:
+                futures[record_id].set_result(found.get(record_id))
+        finally:
+            with _inflight_lock:
+                for record_id in chunk_ids:
+                    _inflight.pop(scope + (record_id,), None)
+
+    base_len = len(f"/api/collections/{collection}/records?perPage=000&skipTotal=1&filter=")
+    base_len += len(_encode(fields or "")) + len(_encode(expand or "")) + 20
+    chunks = chunk_or_filters(mine, lambda i: f"id={_quote(i)}", base_len)
+    if len(chunks) == 1:
+        run(chunks[0])
+    elif chunks:
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            list(pool.map(run, chunks))
+
+    return [futures[record_id].result() for record_id in ids]
+
+
+# ---------------------------------------------------------------------------
+# Batch writes / upsert
+# ---------------------------------------------------------------------------
+
+# PocketBase's default batch.maxRequests setting.
+BATCH_SIZE = 50
+
+
+def send_batch(requests, target=None):
+    """
+    Send one transactional /api/batch request (batch API must be enabled
+    in Settings). Returns the list of {status, body} results.
+    """
+    return pb_authed_request("POST", "/api/batch", data={"requests": requests},
+                             target=target)
+
+
+def _literal(value):
+    """Render a Python value as a filter literal."""
+    if value is None:
+        return "null"
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (int, float)):
+        return repr(value)
+    return _quote(value)
+
+
+def _date_key(value):
+    """Parse a PocketBase or ISO 8601 date string to naive UTC, else None."""
+    if not isinstance(value, str) or not value.strip():
+        return None
+    try:
+        parsed = datetime.datetime.fromisoformat(value.strip().replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def _same_value(new, old, is_date=False):
+    if is_date:
+        new_date, old_date = _date_key(new), _date_key(old)
+        if new_date is not None and old_date is not None:
+            return new_date == old_date
+    if isinstance(new, (int, float)) and isinstance(old, (int, float)) \
+            and not isinstance(new, bool) and not isinstance(old, bool):
+        return new == old
+    if new is None:
+        return old in (None, "", 0, False, [])
+    return new == old
+
+
+def iter_rows(path):
+    """Yield rows from NDJSON (streamed), a JSON array file, or '-' for stdin."""
+    f = sys.stdin if path == "-" else open(path, "r", encoding="utf-8")
+    try:
+        first = f.read(1)
+        while first and first.isspace():
+            first = f.read(1)
+        if first == "[":
+            yield from json.loads(first + f.read())
+            return
+        pending = first
+        for line in f:
+            line = (pending + line).strip()
+            pending = ""
+            if line:
+                yield json.loads(line)
+        if pending.strip():
+            yield json.loads(pending)
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+
+def _chunks(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _lookup_by_keys(collection, keys, key_values, fields, target):
+    """Resolve existing records for many key tuples with coalesced queries."""
+    def term(values):
+        return "(" + " && ".join(f"{k}={_literal(v)}" for k, v in zip(keys, values)) + ")"
+
+    base_len = len(f"/api/collections/{collection}/records?perPage=000&skipTotal=1&filter=")
+    base_len += len(_encode(fields)) + 20
+    found = {}
+    for chunk, filter_expr in chunk_or_filters(key_values, term, base_len):
+        params = [f"perPage={len(chunk)}", "skipTotal=1",
+                  f"filter={_encode(filter_expr)}", f"fields={_encode(fields)}"]
+        data = pb_authed_request(
+            "GET", f"/api/collections/{collection}/records?" + "&".join(params),
+            target=target)
+        for record in data.get("items", []):
+            found.setdefault(tuple(record.get(k) for k in keys), record)
+    return found
+
+
+def upsert_rows(collection, rows, keys, chunk_size=BATCH_SIZE, workers=4,
+                validator=None, target=None):
+    """
+    Insert or update rows matched on the unique ``keys`` fields.
+
+    For each chunk, existing ids are resolved with one coalesced filter
+    query; creates and changed-field PATCHes are then sent together as one
+    /api/batch request, with up to ``workers`` batches in flight. Rows whose
+    fields already match the stored record (dates compared as instants) are
+    skipped. With a pb_validate.RecordValidator, invalid inserts/changes are
+    rejected locally.
+
+    Returns:
+        Dict with inserted/updated/unchanged/failed counts and errors.
+    """
+    stats = {"inserted": 0, "updated": 0, "unchanged": 0, "failed": 0, "errors": []}
+    lock = threading.Lock()
+    base = f"/api/collections/{collection}/records"
+    schema = pb_authed_request("GET", f"/api/collections/{collection}", target=target)
+    date_fields = {f["name"] for f in schema.get("fields", [])
+                   if f.get("type") in ("date", "autodate")}
+
+    def fail(count, error):
+        with lock:
+            stats["failed"] += count
+            if len(stats["errors"]) < 20:
+                stats["errors"].append(error)
+
+    def write(batch, kinds):
+        try:
+            send_batch(batch, target=target)
+        except Exception as e:
+            fail(len(batch), {"status": e.status, "data": e.data}
+                 if isinstance(e, PBRequestError) else {"message": str(e)})
+            return
+        with lock:
+            for kind in kinds:
+                stats[kind] += 1
+
+    pending = []  # (future, key set)
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        for chunk in _chunks(rows, chunk_size):
+            # Last row wins for duplicate keys within a chunk
+            by_key = {}
+            for row in chunk:
+                if any(k not in row for k in keys):
+                    fail(1, {"row": row, "message": "Missing key field"})
+                    continue
+                by_key[tuple(row[k] for k in keys)] = row
+
+            # Wait for in-flight batches touching the same keys (a pending
+            # create would otherwise be missed by the lookup), and keep the
+            # number of queued batches bounded.
+            for fut, ks in pending:
+                if not ks.isdisjoint(by_key):
+                    fut.result()
+            pending = [(f, ks) for f, ks in pending if not f.done()]
+            while len(pending) >= workers * 2:
+                pending[0][0].result()
+                pending = [(f, ks) for f, ks in pending if not f.done()]
+
+            if not by_key:
+                continue
+
+            fields = set(keys) | {"id"}
+            for row in by_key.values():
+                fields.update(row)
+            existing = _lookup_by_keys(collection, keys, list(by_key),
+                                       ",".join(sorted(fields)), target)
+
+            batch, kinds = [], []
+            for key, row in by_key.items():
+                current = existing.get(key)
+                if current is None:
+                    errors = validator.validate(row) if validator else None
+                    if errors:
+                        fail(1, {"row": row, **error_response(errors)})
+                        continue
+                    batch.append({"method": "POST", "url": base, "body": row})
+                    kinds.append("inserted")
+                    continue
+                changes = {k: v for k, v in row.items()
+                           if k != "id"
+                           and not _same_value(v, current.get(k), k in date_fields)}
+                if not changes:
+                    with lock:
+                        stats["unchanged"] += 1
+                    continue
+                errors = validator.validate(changes, partial=True) if validator else None
+                if errors:
+                    fail(1, {"row": row, **error_response(errors, "update")})
+                    continue
+                batch.append({"method": "PATCH", "url": f"{base}/{current['id']}",
+                              "body": changes})
+                kinds.append("updated")
+            if batch:
+                pending.append((pool.submit(write, batch, kinds), set(by_key)))
+    return stats
+
+
+# ---------------------------------------------------------------------------
+# Thumbnail pre-warming
+# ---------------------------------------------------------------------------
+
+# Formats PocketBase generates thumbnails for
+THUMB_EXTENSIONS = (".jpg", ".jpeg", ".png", ".gif", ".webp")
+
+
+class _RateLimiter:
+    """Token bucket shared by worker threads (``rate`` requests/second)."""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate else 0
+        self._next = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            wait = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if wait > 0:
+            time.sleep(wait)
+
+
+class _FileToken:
+    """Superuser file token for protected files, refreshed before expiry."""
+
+    TTL = 90  # tokens are valid for ~2 minutes
+
+    def __init__(self, target):
+        self._target = target
+        self._token = None
+        self._issued = 0
+        self._lock = threading.Lock()
+
+    def get(self):
+        with self._lock:
+            if self._token is None or time.monotonic() - self._issued > self.TTL:
+                data = pb_authed_request("POST", "/api/files/token", target=self._target)
+                self._token = data["token"]
+                self._issued = time.monotonic()
+            return self._token
+
+
+def warm_thumbs(collection, field=None, since=None, concurrency=8, rate=None,
+                per_page=500, target=None):
+    """
+    Request every declared thumb size of every image in a collection so
+    PocketBase generates and caches them ahead of real users.
+
+    Records are enumerated with id-cursor paging (only id + file fields),
+    thumb URLs are fetched by ``concurrency`` threads, each holding a
+    keep-alive connection, under a shared ``rate`` limit (requests/second).
+    Response bodies are read in chunks and discarded.
+
+    Returns:
+        Stats dict (requested, ok, failed, statuses, latency ms, seconds).
+    """
+    target = target or get_target()
+    schema = pb_authed_request("GET", f"/api/collections/{collection}", target=target)
+    file_fields = [f for f in schema.get("fields", [])
+                   if f.get("type") == "file" and f.get("thumbs")
+                   and (field is None or f.get("name") == field)]
+    if not file_fields:
+        raise ValueError(f"No file field with thumbs in '{collection}'"
+                         + (f" named '{field}'" if field else ""))
+
+    token = _FileToken(target) if any(f.get("protected") for f in file_fields) else None
+    limiter = _RateLimiter(rate)
+    jobs = queue.Queue(maxsize=concurrency * 4)
+    stats = {"records": 0, "requested": 0, "ok": 0, "failed": 0, "statuses": {}}
+    latencies = []
+    lock = threading.Lock()
+
+    def worker():
+        conn = PBConnection(target["url"])
+        try:
+            while True:
+                job = jobs.get()
+                if job is None:
+                    return
+                path, protected = job
+                limiter.acquire()
+                started = time.perf_counter()
+                try:
+                    if protected:
+                        path += f"&token={_encode(token.get())}"
+                    resp = conn.open("GET", path)
+                    while resp.read(65536):
+                        pass
+                    status = resp.status
+                except Exception:
+                    conn.close()
+                    status = 0
+                elapsed = (time.perf_counter() - started) * 1000
+                with lock:
+                    stats["requested"] += 1
+                    stats["ok" if status == 200 else "failed"] += 1
+                    stats["statuses"][str(status)] = stats["statuses"].get(str(status), 0) + 1
+                    latencies.append(elapsed)
+        finally:
+            conn.close()
+
+    started = time.monotonic()
+    threads = [threading.Thread(target=worker, daemon=True)
+               for _ in range(max(1, concurrency))]
+    for t in threads:
+        t.start()
+    try:
+        fields = ",".join(f["name"] for f in file_fields)
+        filter_expr = f"updated >= {_quote(since)}" if since else None
+        for record in iter_records(collection, filter_expr=filter_expr, fields=fields,
+                                   per_page=per_page, target=target):
+            stats["records"] += 1
+            for f in file_fields:
+                names = record.get(f["name"]) or []
+                if isinstance(names, str):
+                    names = [names]
+                for name in names:
+                    if not name.lower().endswith(THUMB_EXTENSIONS):
+                        continue
+                    base = f"/api/files/{schema['id']}/{record['id']}/{_encode(name)}"
+                    for thumb in f["thumbs"]:
+                        jobs.put((f"{base}?thumb={_encode(thumb)}", f.get("protected")))
+    finally:
+        for _ in threads:
+            jobs.put(None)
+        for t in threads:
+            t.join()
+
+    latencies.sort()
+
+    def pct(q):
+        return round(latencies[min(len(latencies) - 1, int(q * len(latencies)))], 1) \
+            if latencies else None
+
+    stats["latencyMs"] = {"p50": pct(0.5), "p95": pct(0.95),
+                          "max": round(latencies[-1], 1) if latencies else None}
+    stats["seconds"] = round(time.monotonic() - started, 3)
+    return stats
+
+
+# ---------------------------------------------------------------------------
+# Aggregation
+# ---------------------------------------------------------------------------
+
+AGG_OPS = ("count", "sum", "avg", "min", "max")
+
+
+def parse_aggs(spec):
+    """
+    Parse "count,sum:x,avg:y" into [(label, op, field)]. ``count`` counts
+    rows; ``count:x`` counts rows where x is not blank.
+    """
+    aggs = []
+    for part in filter(None, (p.strip() for p in (spec or "count").split(","))):
+        op, _, field = part.partition(":")
+        op, field = op.strip().lower(), field.strip() or None
+        if op not in AGG_OPS:
+            raise ValueError(f"Unknown aggregate '{op}' (use {', '.join(AGG_OPS)})")
+        if op != "count" and not field:
+            raise ValueError(f"Aggregate '{op}' needs a field, e.g. {op}:price")
+        aggs.append((part, op, field))
+    return aggs
+
+
+def _group_value(value):
+    """Make a field value usable as a dict key (multi-value fields -> tuple)."""
+    if isinstance(value, list):
+        return tuple(_group_value(v) for v in value)
+    if isinstance(value, dict):
+        return json.dumps(value, sort_keys=True)
+    return value
+
+
+def _number(value):
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return None
+    return value
+
+
+class _GroupAggregate:
+    """Running accumulators for one group; O(len(aggs)) memory."""
+
+    __slots__ = ("count", "values")
+
+    def __init__(self, aggs):
+        self.count = 0
+        self.values = [[0, 0] if op in ("sum", "avg", "count") else None
+                       for _, op, _ in aggs]
+
+    def add(self, record, aggs):
+        self.count += 1
+        for i, (_, op, field) in enumerate(aggs):
+            if field is None:
+                continue
+            value = record.get(field)
+            if value is None or value == "" or value == []:
+                continue
+            if op == "count":
+                self.values[i][1] += 1
+                continue
+            if op in ("sum", "avg"):
+                value = _number(value)
+                if value is not None:
+                    self.values[i][0] += value
+                    self.values[i][1] += 1
+                continue
+            current = self.values[i]
+            try:
+                if current is None or (value < current if op == "min" else value > current):
+                    self.values[i] = value
+            except TypeError:
+                pass  # mixed types in one field; keep the first comparable kind
+
+    def result(self, aggs):
+        out = {}
+        for (label, op, field), value in zip(aggs, self.values):
+            if op == "count":
+                out[label] = self.count if field is None else value[1]
+            elif op == "sum":
+                out[label] = value[0]
+            elif op == "avg":
+                out[label] = value[0] / value[1] if value[1] else None
+            else:
+                out[label] = value
+        return out
+
+
+def aggregate(collection, group_by=None, aggs=None, filter_expr=None,
+              per_page=500, target=None):
+    """
+    Compute count/sum/avg/min/max over a collection, optionally grouped.
+
+    Only the id, group-by and aggregated fields are requested (``fields``
+    projection) and records are consumed one at a time from id-cursor
+    pages, so memory grows with the number of groups, not rows. A plain
+    row count without grouping is answered from ``totalItems`` of a
+    single 1-row request.
+
+    Returns:
+        Dict with ``rows`` scanned and a ``groups`` list of
+        {"group": {field: value}, <label>: value, ...}.
+    """
+    group_by = list(group_by or [])
+    aggs = aggs or parse_aggs("count")
+
+    if not group_by and all(op == "count" and field is None for _, op, field in aggs):
+        params = ["perPage=1", "fields=id"]
+        if filter_expr:
+            params.append(f"filter={_encode(filter_expr)}")
+        data = pb_authed_request(
+            "GET", f"/api/collections/{collection}/records?" + "&".join(params),
+            target=target)
+        total = data.get("totalItems", 0)
+        return {"rows": total, "groups": [{"group": {}, **{a[0]: total for a in aggs}}]}
+
+    fields = list(dict.fromkeys(["id"] + group_by + [f for _, _, f in aggs if f]))
+    groups = {}
+    rows = 0
+    for record in iter_records(collection, filter_expr=filter_expr,
+                               fields=",".join(fields), per_page=per_page,
+                               target=target):
+        rows += 1
+        key = tuple(_group_value(record.get(f)) for f in group_by)
+        acc = groups.get(key)
+        if acc is None:
+            acc = groups[key] = _GroupAggregate(aggs)
+        acc.add(record, aggs)
+
+    if not group_by and not groups:
+        groups[()] = _GroupAggregate(aggs)
+
+    def plain(value):
+        return list(plain(v) for v in value) if isinstance(value, tuple) else value
+
+    ordered = []
+    for key, acc in groups.items():
+        group = {f: plain(v) for f, v in zip(group_by, key)}
+        ordered.append((-acc.count, json.dumps(group, sort_keys=True, default=str),
+                        {"group": group, **acc.result(aggs)}))
+    # Largest groups first, ties in a stable key order
+    ordered.sort(key=lambda item: item[:2])
+    result = [entry for _, _, entry in ordered]
+    return {"rows": rows, "groups": result}
+
+
+# ---------------------------------------------------------------------------
+# Collection copy between instances
+# ---------------------------------------------------------------------------
+
+# Fields that are output-only or managed by the server
+_COPY_SKIP_TYPES = ("autodate", "password", "file")
+_UPLOAD_SUFFIX = re.compile(r"^(.+)_[0-9a-zA-Z]{10}(\.[^.]*)?$")
+_RETRY_STATUSES = (0, 429, 500, 502, 503, 504)
+
+
+def _original_filename(name):
+    """Strip the random suffix PocketBase appends, so re-uploads don't stack them."""
+    match = _UPLOAD_SUFFIX.match(name)
+    return match.group(1) + (match.group(2) or "") if match else name
+
+
+def _load_checkpoint(path, scope):
+    if not path or not os.path.isfile(path):
+        return None
+    with open(path, "r") as f:
+        state = json.load(f)
+    if state.get("scope") != scope:
+        raise ValueError(f"Checkpoint {path} was written for a different collection, "
+                         "source, target or filter; use --restart or another file")
+    return state
+
+
+def _save_checkpoint(path, state):
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(state, f)
+    os.replace(tmp, path)
+
+
+def _with_retries(send, attempts=3):
+    """Call ``send()``, retrying transient failures (network, 429, 5xx) with backoff."""
+    for attempt in range(attempts):
+        try:
+            return send()
+        except PBRequestError as e:
+            if e.status not in _RETRY_STATUSES or attempt == attempts - 1:
+                raise
+        except OSError:
+            if attempt == attempts - 1:
+                raise
+        time.sleep(0.5 * 2 ** attempt)
+
+
+class _FileCopier:
+    """
+    Upserts one record together with its files as a single-request
+    multipart /api/batch call (``@jsonPayload`` plus ``requests.0.<field>``
+    file parts), so required file fields are present on create. File
+    bytes are forwarded chunk by chunk from the source download, never held
+    in memory or written to disk. One instance per consumer thread (owns
+    two connections).
+    """
+
+    def __init__(self, collection, source_id, file_fields, source, dest, file_token):
+        self.base = f"/api/collections/{collection}/records"
+        self.source_id = source_id
+        self.fields = file_fields
+        self.dest = dest
+        self.file_token = file_token
+        self.src = PBConnection(source["url"], timeout=120)
+        self.dst = PBConnection(dest["url"], timeout=120)
+
+    def close(self):
+        self.src.close()
+        self.dst.close()
+
+    def _parts(self, record, body, boundary, sent):
+        payload = json.dumps({"requests": [{"method": "PUT", "url": self.base, "body": body}]})
+        yield (f"--{boundary}\r\nContent-Disposition: form-data; name=\"@jsonPayload\"\r\n"
+               f"Content-Type: application/json\r\n\r\n{payload}\r\n").encode("utf-8")
+        for f in self.fields:
+            names = record.get(f["name"]) or []
+            for name in [names] if isinstance(names, str) else names:
+                path = f"/api/files/{self.source_id}/{record['id']}/{_encode(name)}"
+                if f.get("protected"):
+                    path += f"?token={_encode(self.file_token.get())}"
+                resp = self.src.open("GET", path)
+                if resp.status != 200:
+                    resp.read()
+                    raise PBRequestError(resp.status, {"message": f"Cannot read file {name}"})
+                ctype = resp.getheader("Content-Type") or "application/octet-stream"
+                filename = _original_filename(name).replace('"', "")
+                yield (f"--{boundary}\r\nContent-Disposition: form-data; "
+                       f'name="requests.0.{f["name"]}"; filename="{filename}"\r\n'
+                       f"Content-Type: {ctype}\r\n\r\n").encode("utf-8")
+                while True:
+                    chunk = resp.read(65536)
+                    if not chunk:
+                        break
+                    sent[0] += len(chunk)
+                    yield chunk
+                yield b"\r\n"
+        yield f"--{boundary}--\r\n".encode("utf-8")
+
+    def upsert(self, record, body):
+        """PUT ``body`` with every file of ``record``; returns bytes transferred."""
+        boundary = "pbcopy" + os.urandom(12).hex()
+        sent = [0]
+        try:
+            resp = self.dst.open(
+                "POST", "/api/batch", token=get_superuser_token(target=self.dest),
+                headers={"Content-Type": f"multipart/form-data; boundary={boundary}"},
+                body=self._parts(record, body, boundary, sent))
+            raw = resp.read()
+        except Exception:
+            self.src.close()
+            self.dst.close()
+            raise
+        if resp.status >= 400:
+            try:
+                data = json.loads(raw)
+            except ValueError:
+                data = {"message": raw[:200].decode("utf-8", "replace")}
+            raise PBRequestError(resp.status, data)
+        return sent[0]
+
+
+def copy_collection(collection, source, dest, filter_expr=None, per_page=500,
+                    chunk_size=BATCH_SIZE, workers=4, files=False, checkpoint=None,
+                    restart=False, validator=None, random_passwords=False):
+    """
+    Copy records from one instance to another, preserving ids.
+
+    A producer (this thread) reads the source with id-cursor paging and
+    puts chunks on a bounded queue; ``workers`` consumer threads write
+    each chunk to the target as one /api/batch of PUT (upsert) requests.
+    With ``files``, records that have files are instead upserted one by
+    one as multipart batch requests carrying the files, streamed straight
+    from the source. Reads and writes overlap, so throughput tracks the
+    slower of the two instances, and the queue bound caps memory.
+
+    With ``checkpoint``, the id of the last chunk in the contiguous run of
+    completed chunks is saved after each write; a rerun resumes after it.
+    Re-sent chunks are harmless because PUT is idempotent.
+
+    Auth collections: password hashes cannot be read through the API, so
+    new target records get a random password (``random_passwords`` must
+    be set) and users have to reset it. Existing target users keep theirs.
+
+    Returns:
+        Stats dict (read, written, failed, files, bytes, seconds, lastId).
+    """
+    if source["url"] == dest["url"]:
+        raise ValueError("Source and target are the same instance")
+    schema = pb_authed_request("GET", f"/api/collections/{collection}", target=source)
+    pb_authed_request("GET", f"/api/collections/{collection}", target=dest)
+    is_auth = schema.get("type") == "auth"
+    if is_auth and not random_passwords:
+        raise ValueError("Passwords of auth records cannot be copied; pass "
+                         "--random-passwords to create new users with random passwords")
+    skip = {f["name"] for f in schema.get("fields", []) if f.get("type") in _COPY_SKIP_TYPES}
+    skip.update(("collectionId", "collectionName", "expand"))
+    all_file_fields = [f for f in schema.get("fields", []) if f.get("type") == "file"]
+    required_files = [f["name"] for f in all_file_fields if f.get("required")]
+    if required_files and not files:
+        raise ValueError(f"Required file field(s) {', '.join(required_files)} cannot be "
+                         "left empty on create; pass --files to copy them")
+    file_fields = all_file_fields if files else []
+
+    scope = {"collection": collection, "from": source["url"], "to": dest["url"],
+             "filter": filter_expr}
+    state = None if restart else _load_checkpoint(checkpoint, scope)
+    after = state["lastId"] if state else None
+
+    stats = {"read": 0, "written": 0, "failed": 0, "files": 0, "bytes": 0,
+             "resumedAfter": after, "errors": []}
+    lock = threading.Lock()
+    progress = {"next": 0, "done": {}, "lastId": after,
+                "copied": state.get("copied", 0) if state else 0}
+    chunks = queue.Queue(maxsize=max(1, workers) * 2)
+    file_token = _FileToken(source) if any(f.get("protected") for f in file_fields) else None
+    base = f"/api/collections/{collection}/records"
+
+    def fail(count, error):
+        with lock:
+            stats["failed"] += count
+            if len(stats["errors"]) < 20:
+                stats["errors"].append(error)
+
+    def finish(seq, last_id, ok, written):
+        with lock:
+            progress["done"][seq] = (last_id, ok, written)
+            advanced = False
+            while progress["next"] in progress["done"]:
+                last, chunk_ok, count = progress["done"][progress["next"]]
+                if not chunk_ok:
+                    break
+                del progress["done"][progress["next"]]
+                progress["next"] += 1
+                progress["lastId"] = last
+                progress["copied"] += count
+                advanced = True
+            if checkpoint and advanced:
+                try:
+                    _save_checkpoint(checkpoint, {"scope": scope,
+                                                  "lastId": progress["lastId"],
+                                                  "copied": progress["copied"]})
+                except OSError as e:
+                    if len(stats["errors"]) < 20:
+                        stats["errors"].append({"message": f"Checkpoint not saved: {e}"})
+
+    def bodies(rows):
+        """PUT bodies keyed by id; new auth records get a random password."""
+        new_ids = set()
+        if is_auth:
+            found = get_many(collection, [r["id"] for r in rows], fields="id",
+                             workers=1, target=dest)
+            new_ids = {r["id"] for r, hit in zip(rows, found) if hit is None}
+        result = {}
+        for row in rows:
+            body = {k: v for k, v in row.items() if k not in skip}
+            if row["id"] in new_ids:
+                body["password"] = body["passwordConfirm"] = os.urandom(18).hex()
+            result[row["id"]] = body
+        return result
+
+    def error_entry(e, **extra):
+        return {**extra, **({"status": e.status, "data": e.data}
+                            if isinstance(e, PBRequestError) else {"message": str(e)})}
+
+    def consumer():
+        copier = (_FileCopier(collection, schema["id"], file_fields, source, dest, file_token)
+                  if file_fields else None)
+        try:
+            while True:
+                item = chunks.get()
+                if item is None:
+                    return
+                seq, rows = item
+                ok = True
+                if validator:
+                    valid = []
+                    for row in rows:
+                        errors = validator.validate({k: v for k, v in row.items()
+                                                     if k not in skip})
+                        if errors:
+                            ok = False
+                            fail(1, {"id": row["id"], **error_response(errors)})
+                        else:
+                            valid.append(row)
+                    rows = valid
+                written = 0
+                try:
+                    prepared = bodies(rows) if rows else {}
+                except Exception as e:
+                    ok = False
+                    fail(len(rows), error_entry(e))
+                    rows = []
+                with_files = [r for r in rows
+                              if any(r.get(f["name"]) for f in file_fields)]
+                file_ids = {r["id"] for r in with_files}
+                plain = [{"method": "PUT", "url": base, "body": prepared[r["id"]]}
+                         for r in rows if r["id"] not in file_ids]
+                if plain:
+                    try:
+                        _with_retries(lambda: send_batch(plain, target=dest))
+                        written += len(plain)
+                    except Exception as e:
+                        ok = False
+                        fail(len(plain), error_entry(e))
+                for row in with_files:
+                    try:
+                        size = _with_retries(lambda: copier.upsert(row, prepared[row["id"]]))
+                    except Exception as e:
+                        ok = False
+                        fail(1, error_entry(e, id=row["id"]))
+                        continue
+                    written += 1
+                    with lock:
+                        stats["files"] += 1
+                        stats["bytes"] += size
+                with lock:
+                    stats["written"] += written
+                finish(seq, item[1][-1]["id"], ok, written)
+        finally:
+            if copier:
+                copier.close()
+
+    started = time.monotonic()
+    threads = [threading.Thread(target=consumer, daemon=True)
+               for _ in range(max(1, workers))]
+    for t in threads:
+        t.start()
+    try:
+        records = iter_records(collection, filter_expr=filter_expr, per_page=per_page,
+                               target=source, after=after)
+        for seq, rows in enumerate(_chunks(records, chunk_size)):
+            stats["read"] += len(rows)
+            chunks.put((seq, rows))
+    finally:
+        for _ in threads:
+            chunks.put(None)
+        for t in threads:
+            t.join()
+
+    seconds = time.monotonic() - started
+    stats["lastId"] = progress["lastId"]
+    stats["seconds"] = round(seconds, 3)
+    stats["rowsPerSecond"] = round(stats["written"] / seconds, 1) if seconds else None
+    if checkpoint:
+        stats["checkpoint"] = checkpoint
+    return stats
+
+
+# ---------------------------------------------------------------------------
+# Partitioned parallel export
+# ---------------------------------------------------------------------------
+
+_ID_CHARS = "0123456789abcdefghijklmnopqrstuvwxyz"
+_PB_DATETIME = "%Y-%m-%d %H:%M:%S.%fZ"
+
+
+def _parse_datetime(value):
+    value = value.replace("T", " ")
+    if "." not in value:
+        value = value.rstrip("Z") + ".000Z"
+    return datetime.datetime.strptime(value, _PB_DATETIME)
+
+
+def _format_datetime(value):
+    return value.strftime("%Y-%m-%d %H:%M:%S.") + f"{value.microsecond // 1000:03d}Z"
+
+
+def _range_filters(field, bounds):
+    """Half-open ranges [b_i, b_i+1) with open ends, so shards are disjoint
+    and together cover every row whatever values appear at the boundaries."""
+    filters = []
+    for i in range(len(bounds) + 1):
+        parts = []
+        if i > 0:
+            parts.append(f"{field} >= {_quote(bounds[i - 1])}")
+        if i < len(bounds):
+            parts.append(f"{field} < {_quote(bounds[i])}")
+        filters.append(" && ".join(parts))
+    return filters
+
+
+def partition_filters(collection, shards, partition="created", filter_expr=None,
+                      target=None):
+    """
+    Split a collection into ``shards`` disjoint filter ranges.
+
+    ``created`` splits the [min, max] creation time evenly; ``id`` splits
+    the two-character id prefix space evenly (no request needed).
+    """
+    if shards <= 1:
+        return [""]
+    if partition == "id":
+        space = len(_ID_CHARS) ** 2
+        bounds = []
+        for i in range(1, shards):
+            n = i * space // shards
+            bounds.append(_ID_CHARS[n // len(_ID_CHARS)] + _ID_CHARS[n % len(_ID_CHARS)])
+        return _range_filters("id", sorted(set(bounds)))
+
+    def edge(sort):
+        params = [f"sort={sort}", "perPage=1", "skipTotal=1", "fields=created"]
+        if filter_expr:
+            params.append(f"filter={_encode(filter_expr)}")
+        data = pb_authed_request(
+            "GET", f"/api/collections/{collection}/records?" + "&".join(params),
+            target=target)
+        items = data.get("items", [])
+        return _parse_datetime(items[0]["created"]) if items and items[0].get("created") else None
+
+    low, high = edge("created"), edge("-created")
+    if low is None or high is None or low == high:
+        return [""]
+    step = (high - low) / shards
+    bounds = [_format_datetime(low + step * i) for i in range(1, shards)]
+    return _range_filters("created", sorted(set(bounds)))
+
+
+class _HashingWriter(io.RawIOBase):
+    """Binary sink that hashes and counts bytes on their way to a file."""
+
+    def __init__(self, f):
+        self._f = f
+        self.sha256 = hashlib.sha256()
+        self.size = 0
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        self.sha256.update(b)
+        self.size += len(b)
+        return self._f.write(b)
+
+
+def _export_shard(spec):
+    """Export one range to one file. Runs in a worker process."""
+    started = time.monotonic()
+    parts = [f"({p})" for p in (spec["base_filter"], spec["range_filter"]) if p]
+    rows = 0
+    with open(spec["path"], "wb") as raw:
+        sink = _HashingWriter(raw)
+        stream = gzip.GzipFile(fileobj=sink, mode="wb") if spec["gzip"] else sink
+        text = io.TextIOWrapper(stream, encoding="utf-8", newline="")
+        writer = None
+        if spec["format"] == "csv":
+            writer = csv.writer(text)
+            writer.writerow(spec["columns"])
+        for record in iter_records(spec["collection"],
+                                   filter_expr=" && ".join(parts) or None,
+                                   fields=spec["fields"], expand=spec["expand"],
+                                   per_page=spec["per_page"], target=spec["target"]):
+            if writer:
+                writer.writerow([
+                    json.dumps(v, ensure_ascii=False) if isinstance(v, (dict, list)) else v
+                    for v in (record.get(c) for c in spec["columns"])])
+            else:
+                text.write(json.dumps(record, ensure_ascii=False) + "\n")
+            rows += 1
+        text.flush()
+        text.detach()
+        if spec["gzip"]:
+            stream.close()
+    return {
+        "file": os.path.basename(spec["path"]),
+        "filter": spec["range_filter"],
+        "rows": rows,
+        "bytes": sink.size,
+        "sha256": sink.sha256.hexdigest(),
+        "seconds": round(time.monotonic() - started, 3),
+    }
+
+
+def export_partitioned(collection, out_dir, shards=4, workers=4, partition="created",
+                       fmt="ndjson", compress=False, filter_expr=None, fields=None,
+                       expand=None, per_page=500, target=None):
+    """
+    Export disjoint ranges of a collection in parallel worker processes,
+    one shard file per range, and write manifest.json with row counts and
+    checksums. Each worker authenticates and connects on its own.
+
+    Returns:
+        The manifest dict.
+    """
+    target = target or get_target()
+    os.makedirs(out_dir, exist_ok=True)
+    filters = partition_filters(collection, shards, partition, filter_expr, target)
+
+    columns = None
+    if fmt == "csv":
+        if fields:
+            columns = [f.strip() for f in fields.split(",") if f.strip()]
+            if "id" not in columns:
+                columns.insert(0, "id")
+        else:
+            schema = pb_authed_request("GET", f"/api/collections/{collection}",
+                                       target=target)
+            columns = [f["name"] for f in schema.get("fields", []) if not f.get("hidden")]
+
+    ext = ("csv" if fmt == "csv" else "ndjson") + (".gz" if compress else "")
+    specs = [{
+        "collection": collection,
+        "path": os.path.join(out_dir, f"{collection}-{i:04d}.{ext}"),
+        "base_filter": filter_expr or "",
+        "range_filter": rf,
+        "fields": fields,
+        "expand": expand,
+        "per_page": per_page,
+        "format": fmt,
+        "gzip": compress,
+        "columns": columns,
+        "target": target,
+    } for i, rf in enumerate(filters)]
+
+    started = time.monotonic()
+    # spawn: every worker starts clean and logs in with its own token
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=max(1, workers), mp_context=ctx) as pool:
+        results = list(pool.map(_export_shard, specs))
+
+    manifest = {
+        "collection": collection,
+        "partition": partition,
+        "format": fmt,
+        "gzip": compress,
+        "filter": filter_expr,
+        "fields": fields,
+        "columns": columns,
+        "exportedAt": datetime.datetime.now(datetime.timezone.utc).strftime(_PB_DATETIME),
+        "seconds": round(time.monotonic() - started, 3),
+        "totalRows": sum(r["rows"] for r in results),
+        "shards": results,
+    }
+    with open(os.path.join(out_dir, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
 def cmd_list(args):
     qs = _build_qs(args)
     try:
@@ -93,8 +1273,53 @@ def cmd_get(args):
         sys.exit(1)
 
 
+def cmd_get_many(args):
+    ids = list(args.record_ids or [])
+    if args.file:
+        try:
+            with open(args.file, "r") as f:
+                ids.extend(line.strip() for line in f if line.strip())
+        except FileNotFoundError:
+            print_result(False, 0, {"message": f"File not found: {args.file}"})
+            sys.exit(1)
+    if not ids:
+        print_result(False, 0, {"message": "At least one record id is required"})
+        sys.exit(1)
+    try:
+        records = get_many(args.collection, ids, fields=args.fields,
+                           expand=args.expand, workers=args.workers)
+    except PBRequestError as e:
+        print_result(False, e.status, e.data)
+        sys.exit(1)
+    items = [r if r is not None else {"id": i, "notFound": True}
+             for i, r in zip(ids, records)]
+    print_result(True, 200, {
+        "items": items,
+        "found": sum(1 for r in records if r is not None),
+        "notFound": sum(1 for r in records if r is None),
+    })
+
+
+def _check_locally(args, body, partial=False):
+    """Reject an invalid body before sending it (--validate)."""
+    if not getattr(args, "validate", False):
+        return
+    try:
+        errors = get_validator(args.collection).validate(body, partial=partial)
+    except ValueError as e:
+        print_result(False, 0, {"message": str(e)})
+        sys.exit(1)
+    except PBRequestError as e:
+        print_result(False, e.status, e.data)
+        sys.exit(1)
+    if errors:
+        print_result(False, 400, error_response(errors, "update" if partial else "create"))
+        sys.exit(1)
+
+
 def cmd_create(args):
     body = _get_body(args)
+    _check_locally(args, body)
     qs_parts = []
     if getattr(args, "expand", None):
         qs_parts.append(f"expand={_encode(args.expand)}")
@@ -110,6 +1335,7 @@ def cmd_create(args):
 
 def cmd_update(args):
     body = _get_body(args)
+    _check_locally(args, body, partial=True)
     qs_parts = []
     if getattr(args, "expand", None):
         qs_parts.append(f"expand={_encode(args.expand)}")
@@ -136,6 +1362,126 @@ def cmd_delete(args):
         sys.exit(1)
 
 
+def cmd_export(args):
+    if args.out_dir:
+        try:
+            manifest = export_partitioned(
+                args.collection, args.out_dir, shards=args.shards,
+                workers=args.workers, partition=args.partition, fmt=args.format,
+                compress=args.gzip, filter_expr=args.filter, fields=args.fields,
+                expand=args.expand, per_page=args.perPage)
+        except PBRequestError as e:
+            print_result(False, e.status, e.data)
+            sys.exit(1)
+        print_result(True, 200, {
+            "message": f"Exported {manifest['totalRows']} record(s) from "
+                       f"'{args.collection}' in {len(manifest['shards'])} shard(s)",
+            "manifest": os.path.join(args.out_dir, "manifest.json"),
+            "seconds": manifest["seconds"],
+        })
+        return
+
+    out = open(args.out, "w", encoding="utf-8") if args.out else sys.stdout
+    count = 0
+    try:
+        for record in iter_records(args.collection, filter_expr=args.filter,
+                                   fields=args.fields, expand=args.expand,
+                                   per_page=args.perPage):
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            count += 1
+    except PBRequestError as e:
+        print_result(False, e.status, e.data)
+        sys.exit(1)
+    finally:
+        if args.out:
+            out.close()
+    if args.out:
+        print_result(True, 200, {
+            "message": f"Exported {count} record(s) from '{args.collection}'",
+            "file": args.out,
+            "count": count,
+        })
+
+
+def cmd_upsert(args):
+    keys = [k.strip() for k in args.key.split(",") if k.strip()]
+    if not keys:
+        print_result(False, 0, {"message": "--key requires at least one field"})
+        sys.exit(1)
+    try:
+        validator = get_validator(args.collection) if args.validate else None
+        stats = upsert_rows(args.collection, iter_rows(args.file), keys,
+                            chunk_size=args.chunk, workers=args.workers,
+                            validator=validator)
+    except json.JSONDecodeError as e:
+        print_result(False, 0, {"message": f"Invalid JSON in file: {e}"})
+        sys.exit(1)
+    except ValueError as e:
+        print_result(False, 0, {"message": str(e)})
+        sys.exit(1)
+    except FileNotFoundError:
+        print_result(False, 0, {"message": f"File not found: {args.file}"})
+        sys.exit(1)
+    except PBRequestError as e:
+        print_result(False, e.status, e.data)
+        sys.exit(1)
+    print_result(stats["failed"] == 0, 200, stats)
+    if stats["failed"]:
+        sys.exit(1)
+
+
+def cmd_warm_thumbs(args):
+    try:
+        stats = warm_thumbs(args.collection, field=args.field, since=args.since,
+                            concurrency=args.concurrency, rate=args.rate)
+    except ValueError as e:
+        print_result(False, 0, {"message": str(e)})
+        sys.exit(1)
+    except PBRequestError as e:
+        print_result(False, e.status, e.data)
+        sys.exit(1)
+    print_result(stats["failed"] == 0, 200, stats)
+    if stats["failed"]:
+        sys.exit(1)
+
+
+def cmd_aggregate(args):
+    try:
+        aggs = parse_aggs(args.agg)
+        group_by = [f.strip() for f in (args.group_by or "").split(",") if f.strip()]
+        started = time.monotonic()
+        result = aggregate(args.collection, group_by=group_by, aggs=aggs,
+                           filter_expr=args.filter, per_page=args.perPage)
+    except ValueError as e:
+        print_result(False, 0, {"message": str(e)})
+        sys.exit(1)
+    except PBRequestError as e:
+        print_result(False, e.status, e.data)
+        sys.exit(1)
+    result["seconds"] = round(time.monotonic() - started, 3)
+    print_result(True, 200, result)
+
+
+def cmd_copy(args):
+    source, dest = get_target(args.source), get_target(args.dest)
+    try:
+        validator = get_validator(args.collection, target=dest) if args.validate else None
+        stats = copy_collection(
+            args.collection, source, dest, filter_expr=args.filter,
+            per_page=args.perPage, chunk_size=args.chunk, workers=args.workers,
+            files=args.files, checkpoint=args.checkpoint, restart=args.restart,
+            validator=validator, random_passwords=args.random_passwords)
+    except ValueError as e:
+        print_result(False, 0, {"message": str(e)})
+        sys.exit(1)
+    except PBRequestError as e:
+        print_result(False, e.status, e.data)
+        sys.exit(1)
+    print_result(not stats["errors"], 200, stats)
+    if stats["errors"]:
+        sys.exit(1)
+
+
 def main():
     parser = argparse.ArgumentParser(description="PocketBase record management")
     sub = parser.add_subparsers(dest="command")
@@ -160,12 +1506,25 @@ def main():
     p_get.add_argument("--fields", help="Fields to return")
     p_get.set_defaults(func=cmd_get)
 
+    # get-many
+    p_many = sub.add_parser("get-many", help="Get many records by id (coalesced)")
+    p_many.add_argument("collection", help="Collection name or ID")
+    p_many.add_argument("record_ids", nargs="*", help="Record IDs")
+    p_many.add_argument("--file", help="File with one record ID per line")
+    p_many.add_argument("--expand", help="Expand relations")
+    p_many.add_argument("--fields", help="Fields to return (id is always included)")
+    p_many.add_argument("--workers", type=int, default=4,
+                        help="Concurrent lookup requests (default: 4)")
+    p_many.set_defaults(func=cmd_get_many)
+
     # create
     p_create = sub.add_parser("create", help="Create a record")
     p_create.add_argument("collection", help="Collection name or ID")
     p_create.add_argument("json_data", nargs="?", help="JSON body")
     p_create.add_argument("--file", help="JSON file with record data")
     p_create.add_argument("--expand", help="Expand relations in response")
+    p_create.add_argument("--validate", action="store_true",
+                          help="Validate against the cached schema before sending")
     p_create.set_defaults(func=cmd_create)
 
     # update
@@ -175,6 +1534,8 @@ def main():
     p_update.add_argument("json_data", nargs="?", help="JSON body")
     p_update.add_argument("--file", help="JSON file with update data")
     p_update.add_argument("--expand", help="Expand relations in response")
+    p_update.add_argument("--validate", action="store_true",
+                          help="Validate against the cached schema before sending")
     p_update.set_defaults(func=cmd_update)
 
     # delete
@@ -183,6 +1544,93 @@ def main():
     p_delete.add_argument("record_id", help="Record ID")
     p_delete.set_defaults(func=cmd_delete)
 
+    # upsert
+    p_upsert = sub.add_parser("upsert", help="Insert or update rows by unique key")
+    p_upsert.add_argument("collection", help="Collection name or ID")
+    p_upsert.add_argument("--key", required=True,
+                          help="Comma-separated unique key field(s)")
+    p_upsert.add_argument("--file", required=True,
+                          help="NDJSON or JSON array file ('-' for stdin)")
+    p_upsert.add_argument("--chunk", type=int, default=BATCH_SIZE,
+                          help=f"Rows per batch request (default: {BATCH_SIZE})")
+    p_upsert.add_argument("--workers", type=int, default=4,
+                          help="Concurrent batch requests (default: 4)")
+    p_upsert.add_argument("--validate", action="store_true",
+                          help="Reject invalid rows locally (cached schema)")
+    p_upsert.set_defaults(func=cmd_upsert)
+
+    # warm-thumbs
+    p_thumbs = sub.add_parser("warm-thumbs",
+        help="Pre-generate declared thumbnails for image files")
+    p_thumbs.add_argument("collection", help="Collection name or ID")
+    p_thumbs.add_argument("--field", help="Only this file field")
+    p_thumbs.add_argument("--since",
+                          help='Only records updated since this time ("2024-01-01 00:00:00")')
+    p_thumbs.add_argument("--concurrency", type=int, default=8,
+                          help="Concurrent thumb requests (default: 8)")
+    p_thumbs.add_argument("--rate", type=float,
+                          help="Max thumb requests per second (default: unlimited)")
+    p_thumbs.set_defaults(func=cmd_warm_thumbs)
+
+    # export
+    p_export = sub.add_parser("export", help="Export all records as NDJSON")
+    p_export.add_argument("collection", help="Collection name or ID")
+    p_export.add_argument("--filter", help="Filter expression")
+    p_export.add_argument("--fields", help="Fields to return (id is always included)")
+    p_export.add_argument("--expand", help="Expand relations")
+    p_export.add_argument("--perPage", type=per_page_arg, default=500,
+                          help="Records per request (default: 500)")
+    p_export.add_argument("--out", help="Output file (default: stdout)")
+    p_export.add_argument("--out-dir",
+                          help="Write shard files + manifest.json here (parallel mode)")
+    p_export.add_argument("--shards", type=int, default=4,
+                          help="Number of ranges in parallel mode (default: 4)")
+    p_export.add_argument("--workers", type=int, default=4,
+                          help="Worker processes in parallel mode (default: 4)")
+    p_export.add_argument("--partition", choices=("created", "id"), default="created",
+                          help="Range field for parallel mode (default: created)")
+    p_export.add_argument("--format", choices=("ndjson", "csv"), default="ndjson",
+                          help="Shard file format (default: ndjson)")
+    p_export.add_argument("--gzip", action="store_true", help="Gzip shard files")
+    p_export.set_defaults(func=cmd_export)
+
+    # aggregate
+    p_agg = sub.add_parser("aggregate", help="Count/sum/avg/min/max, optionally grouped")
+    p_agg.add_argument("collection", help="Collection name or ID")
+    p_agg.add_argument("--group-by", help="Comma-separated field(s) to group by")
+    p_agg.add_argument("--agg", default="count",
+                       help='Aggregates, e.g. "count,sum:total,avg:total,min:created" '
+                            "(default: count)")
+    p_agg.add_argument("--filter", help="Filter expression")
+    p_agg.add_argument("--perPage", type=per_page_arg, default=500,
+                       help="Records per request (default: 500)")
+    p_agg.set_defaults(func=cmd_aggregate)
+
+    # copy
+    p_copy = sub.add_parser("copy", help="Copy records to another instance (ids preserved)")
+    p_copy.add_argument("collection", help="Collection name or ID")
+    p_copy.add_argument("--from", dest="source",
+                        help="Source target profile (default: PB_URL)")
+    p_copy.add_argument("--to", dest="dest",
+                        help="Destination target profile (default: PB_URL)")
+    p_copy.add_argument("--filter", help="Only copy matching records")
+    p_copy.add_argument("--files", action="store_true",
+                        help="Also stream file fields from source to target")
+    p_copy.add_argument("--checkpoint", help="Progress file; an existing one is resumed")
+    p_copy.add_argument("--restart", action="store_true",
+                        help="Ignore an existing checkpoint and start over")
+    p_copy.add_argument("--chunk", type=int, default=BATCH_SIZE,
+                        help=f"Records per batch request (default: {BATCH_SIZE})")
+    p_copy.add_argument("--workers", type=int, default=4,
+                        help="Concurrent batch writers (default: 4)")
+    p_copy.add_argument("--perPage", type=per_page_arg, default=500,
+                        help="Records per read request (default: 500)")
+    p_copy.add_argument("--validate", action="store_true",
+                        help="Reject invalid rows locally (target schema)")
+    p_copy.add_argument("--random-passwords", action="store_true",
+                        help="Auth collections: give new users a random password")
+    p_copy.set_defaults(func=cmd_copy)
+
     args = parser.parse_args()
     args.func(args)
 
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+TypeScript type generation from PocketBase collection schemas.
+
+Generates the same shape of types as pocketbase-typegen (Collections enum,
+<Name>Record, <Name>Response, CollectionRecords/Responses, TypedPocketBase)
+without Node. A hash of the type-relevant schema is stored in the file
+header; when it is unchanged the file is left untouched.
+
+Usage:
+  python scripts/pb_typegen.py --out src/types/pocketbase-types.ts
+  python scripts/pb_typegen.py --schema pb_schema.json --out src/types/pocketbase-types.ts
+  python scripts/pb_typegen.py --out src/types/pocketbase-types.ts --force
+"""
+
+import argparse
+import hashlib
+import json
+import re
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from pb_config import print_result, PBRequestError
+from pb_collections import fetch_all_collections, _load_json_file
+
+# Bump when the generated output changes so existing files are regenerated.
+GENERATOR_VERSION = 2
+_HASH_LINE = re.compile(r"^ \* schema-hash: ([0-9a-f]{64})$", re.M)
+
+# Schema properties that affect the generated types
+_TYPE_KEYS = ("name", "type", "required", "hidden", "values", "maxSelect")
+
+
+def schema_hash(collections):
+    relevant = [
+        {"name": c["name"], "type": c.get("type"),
+         "fields": [{k: f.get(k) for k in _TYPE_KEYS} for f in c.get("fields", [])]}
+        for c in sorted(collections, key=lambda c: c["name"])
+    ]
+    data = json.dumps([GENERATOR_VERSION, relevant], sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+def _pascal(name):
+    parts = re.split(r"[^0-9a-zA-Z]+", name)
+    result = "".join(p[:1].upper() + p[1:] for p in parts if p)
+    return result if result[:1].isalpha() else "C" + result
+
+
+def _ts_string(value):
+    return json.dumps(value, ensure_ascii=False)
+
+
+def _enum_members(values):
+    """Enum member lines with identifier names ("1" becomes E1 = "1")."""
+    members, seen = [], set()
+    for value in values:
+        name = re.sub(r"[^\w$]", "_", value)
+        if not re.match(r"[^\W\d]|\$", name):
+            name = "E" + name
+        base, n = name, 2
+        while name in seen:
+            name, n = f"{base}_{n}", n + 1
+        seen.add(name)
+        members.append(f"\t{name} = {_ts_string(value)},")
+    return "\n".join(members)
+
+
+def _field_type(coll_type_name, field, enums):
+    ftype = field.get("type")
+    multiple = (field.get("maxSelect") or 1) > 1
+    if ftype == "select":
+        enum_name = f"{coll_type_name}{_pascal(field['name'])}Options"
+        members = _enum_members(field.get("values", []))
+        enums.append(f"export enum {enum_name} {{\n{members}\n}}")
+        return f"{enum_name}[]" if multiple else enum_name
+    if ftype == "relation":
+        return "RecordIdString[]" if multiple else "RecordIdString"
+    if ftype == "file":
+        return "string[]" if multiple else "string"
+    return {
+        "number": "number",
+        "bool": "boolean",
+        "date": "IsoDateString",
+        "autodate": "IsoDateString",
+        "editor": "HTMLString",
+        "json": "null | unknown",
+        "geoPoint": "{ lon: number; lat: number }",
+    }.get(ftype, "string")
+
+
+def generate(collections, digest):
+    """Render the TypeScript module for a list of collection definitions."""
+    collections = sorted(collections, key=lambda c: c["name"])
+    names = [(c["name"], _pascal(c["name"])) for c in collections]
+
+    out = [
+        "/**",
+        " * This file was @generated using pb_typegen.py",
+        f" * schema-hash: {digest}",
+        " */",
+        "",
+        'import type PocketBase from "pocketbase"',
+        'import type { RecordService } from "pocketbase"',
+        "",
+        "export enum Collections {",
+    ]
+    out += [f"\t{type_name} = {_ts_string(name)}," for name, type_name in names]
+    out += [
+        "}",
+        "",
+        "// Alias types for improved usability",
+        "export type IsoDateString = string",
+        "export type RecordIdString = string",
+        "export type HTMLString = string",
+        "",
+        "// System fields",
+        "export type BaseSystemFields<T = unknown> = {",
+        "\tid: RecordIdString",
+        "\tcollectionId: string",
+        "\tcollectionName: Collections",
+        "\texpand?: T",
+        "}",
+        "",
+        "// Record types for each collection",
+    ]
+
+    for coll, (_, type_name) in zip(collections, names):
+        enums, lines = [], []
+        for field in coll.get("fields", []):
+            if field.get("hidden") or field.get("type") == "password":
+                continue
+            optional = "" if field.get("required") or field.get("name") == "id" else "?"
+            ts_type = _field_type(type_name, field, enums)
+            lines.append(f"\t{field['name']}{optional}: {ts_type}")
+        out += enums
+        out += [f"export type {type_name}Record = {{"] + lines + ["}", ""]
+
+    out.append("// Response types include system props and override all optional fields")
+    for _, type_name in names:
+        out.append(f"export type {type_name}Response<Texpand = unknown> = "
+                   f"Required<{type_name}Record> & BaseSystemFields<Texpand>")
+    out += ["", "// Types containing all Records and Responses, useful for creating typing helper functions",
+            "export type CollectionRecords = {"]
+    out += [f"\t{name}: {type_name}Record" for name, type_name in names]
+    out += ["}", "", "export type CollectionResponses = {"]
+    out += [f"\t{name}: {type_name}Response" for name, type_name in names]
+    out += ["}", "", "// Type for usage with type asserted PocketBase instance",
+            "export type TypedPocketBase = PocketBase & {"]
+    out += [f"\tcollection(idOrName: {_ts_string(name)}): RecordService<{type_name}Response>"
+            for name, type_name in names]
+    out += ["}", ""]
+    return "\n".join(out)
+
+
+def _existing_hash(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            head = f.read(512)
+    except OSError:
+        return None
+    match = _HASH_LINE.search(head)
+    return match.group(1) if match else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate TypeScript types from PocketBase collections")
+    parser.add_argument("--out", required=True, help="Output .ts file")
+    parser.add_argument("--schema",
+                        help="Exported collections JSON instead of the running instance")
+    parser.add_argument("--force", action="store_true",
+                        help="Regenerate even if the schema hash is unchanged")
+    args = parser.parse_args()
+
+    if args.schema:
+        collections = _load_json_file(args.schema)
+        if isinstance(collections, dict):
+            collections = collections.get("collections", [])
+    else:
+        try:
+            collections = fetch_all_collections()
+        except PBRequestError as e:
+            print_result(False, e.status, e.data)
+            sys.exit(1)
+
+    digest = schema_hash(collections)
+    if not args.force and _existing_hash(args.out) == digest:
+        print_result(True, 200, {"message": "Schema unchanged; types are up to date",
+                                 "file": args.out, "hash": digest})
+        return
+
+    source = generate(collections, digest)
+    out_dir = os.path.dirname(args.out)
+    if out_dir:
+        os.makedirs(out_dir, exist_ok=True)
+    with open(args.out, "w", encoding="utf-8") as f:
+        f.write(source)
+    print_result(True, 200, {
+        "message": f"Generated types for {len(collections)} collection(s)",
+        "file": args.out,
+        "hash": digest,
+    })
+
+
+if __name__ == "__main__":
+    main()
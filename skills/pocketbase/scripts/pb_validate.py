@@ -0,0 +1,384 @@
+#!/usr/bin/env python3
+"""
+Client-side record validation against cached collection schemas.
+
+Collection definitions are cached locally and re-fetched only for
+collections whose ``updated`` stamp changed. Rows are checked against the
+field rules PocketBase enforces (required, text length/pattern, number
+range/onlyInt, select values, relation ids, email format, email/url domains,
+maxSelect, json size) and rejected with the same error shape the API
+returns, before any request is sent.
+
+Usage:
+  python scripts/pb_validate.py <collection> --file rows.ndjson [--partial]
+  python scripts/pb_validate.py <collection> '<json>'
+  python scripts/pb_validate.py --refresh
+"""
+
+import argparse
+import hashlib
+import json
+import re
+import sys
+import os
+import tempfile
+import urllib.parse
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from pb_config import get_target, pb_authed_request, print_result, PBRequestError
+
+DEFAULT_ID_PATTERN = "^[a-z0-9]+$"
+DEFAULT_ID_LENGTH = 15
+# Applied by PocketBase when a text field's max is 0
+DEFAULT_TEXT_MAX = 5000
+_EMAIL = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+
+
+# ---------------------------------------------------------------------------
+# Schema cache
+# ---------------------------------------------------------------------------
+
+def _cache_path(target):
+    if os.environ.get("PB_SCHEMA_CACHE"):
+        return os.environ["PB_SCHEMA_CACHE"]
+    digest = hashlib.sha1(target["url"].encode("utf-8")).hexdigest()[:12]
+    return os.path.join(tempfile.gettempdir(), f"pb_schema_{digest}.json")
+
+
+def load_schemas(target=None, refresh=False):
+    """
+    Return {name: collection, id: collection} for every collection.
+
+    One light listing (id, name, updated) decides which cached definitions
+    are stale; only those are fetched again.
+    """
+    target = target or get_target()
+    path = _cache_path(target)
+    cache = {"collections": {}, "stamps": {}}
+    if not refresh and os.path.isfile(path):
+        try:
+            with open(path, "r") as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            pass
+
+    stamps, page = {}, 1
+    while True:
+        data = pb_authed_request(
+            "GET", f"/api/collections?page={page}&perPage=500&fields=id,name,updated",
+            target=target)
+        for c in data.get("items", []):
+            stamps[c["id"]] = c.get("updated")
+        if page >= data.get("totalPages", 1):
+            break
+        page += 1
+
+    collections = {cid: c for cid, c in cache["collections"].items() if cid in stamps}
+    stale = [cid for cid, stamp in stamps.items()
+             if cid not in collections or stamp is None
+             or cache["stamps"].get(cid) != stamp]
+    for cid in stale:
+        collections[cid] = pb_authed_request("GET", f"/api/collections/{cid}",
+                                             target=target)
+    if stale or len(collections) != len(cache["collections"]):
+        with open(path, "w") as f:
+            json.dump({"collections": collections, "stamps": stamps}, f)
+
+    by_ref = {}
+    for c in collections.values():
+        by_ref[c["id"]] = c
+        by_ref[c["name"]] = c
+    return by_ref
+
+
+# ---------------------------------------------------------------------------
+# Field rules
+# ---------------------------------------------------------------------------
+
+def _err(code, message):
+    return {"code": code, "message": message}
+
+
+def _blank(value):
+    return value is None or value == "" or value == [] or value == {}
+
+
+def _domain_check(kind, allowed, blocked, host):
+    host = host.lower()
+    if blocked and host in [d.lower() for d in blocked]:
+        return _err(f"validation_{kind}_domain_not_allowed",
+                    f"{kind.capitalize()} domain is not allowed.")
+    if allowed and host not in [d.lower() for d in allowed]:
+        return _err(f"validation_{kind}_domain_not_allowed",
+                    f"{kind.capitalize()} domain is not allowed.")
+    return None
+
+
+def _text_rule(field):
+    min_len, max_len = field.get("min") or 0, field.get("max") or DEFAULT_TEXT_MAX
+    pattern = None
+    if field.get("pattern"):
+        try:
+            pattern = re.compile(field["pattern"])
+        except re.error:
+            pattern = None  # RE2 syntax Python can't compile; leave to the server
+
+    def check(value):
+        value = "" if value is None else str(value)
+        if value == "":
+            return None
+        if min_len and len(value) < min_len:
+            return _err("validation_min_text_constraint",
+                        f"Must be at least {min_len} character(s).")
+        if max_len and len(value) > max_len:
+            return _err("validation_max_text_constraint",
+                        f"Must be less than {max_len} character(s).")
+        if pattern and not pattern.search(value):
+            return _err("validation_invalid_format", "Invalid value format.")
+        return None
+    return check
+
+
+def _number_rule(field):
+    lo, hi, only_int = field.get("min"), field.get("max"), field.get("onlyInt")
+
+    def check(value):
+        if value is None or value == "":
+            return None
+        if isinstance(value, bool):
+            return _err("validation_invalid_number", "Must be a valid number.")
+        try:
+            number = float(value)
+        except (TypeError, ValueError):
+            return _err("validation_invalid_number", "Must be a valid number.")
+        if only_int and not number.is_integer():
+            return _err("validation_only_int_constraint", "Only integers are allowed.")
+        if lo is not None and number < lo:
+            return _err("validation_min_number_constraint", f"Must be larger than {lo}.")
+        if hi is not None and number > hi:
+            return _err("validation_max_number_constraint", f"Must be less than {hi}.")
+        return None
+    return check
+
+
+def _email_rule(field):
+    allowed, blocked = field.get("onlyDomains"), field.get("exceptDomains")
+
+    def check(value):
+        if _blank(value):
+            return None
+        if not isinstance(value, str) or not _EMAIL.match(value):
+            return _err("validation_is_email", "Must be a valid email address.")
+        return _domain_check("email", allowed, blocked, value.rsplit("@", 1)[1])
+    return check
+
+
+def _url_rule(field):
+    allowed, blocked = field.get("onlyDomains"), field.get("exceptDomains")
+
+    def check(value):
+        # The server's URL check also accepts scheme-less values such as
+        # "example.com"; only the domain lists are checked here.
+        if _blank(value) or not isinstance(value, str):
+            return None
+        try:
+            hostname = urllib.parse.urlsplit(value).hostname
+        except ValueError:
+            return None
+        if not hostname:
+            return None
+        return _domain_check("url", allowed, blocked, hostname)
+    return check
+
+
+def _as_list(value):
+    if _blank(value):
+        return []
+    return value if isinstance(value, list) else [value]
+
+
+def _multi_rule(field, item_check):
+    max_select = field.get("maxSelect") or 1
+    min_select = field.get("minSelect") or 0
+
+    def check(value):
+        values = _as_list(value)
+        if len(values) > max_select:
+            return _err("validation_too_many_values", f"Select no more than {max_select}.")
+        if values and len(values) < min_select:
+            return _err("validation_not_enough_values", f"Select at least {min_select}.")
+        for v in values:
+            error = item_check(v)
+            if error:
+                return error
+        return None
+    return check
+
+
+def _select_rule(field):
+    allowed = set(field.get("values") or [])
+
+    def item(v):
+        if v not in allowed:
+            return _err("validation_invalid_value", f"Invalid value {v}.")
+        return None
+    return _multi_rule(field, item)
+
+
+def _relation_rule(field, schemas):
+    target = schemas.get(field.get("collectionId")) or {}
+    id_field = next((f for f in target.get("fields", []) if f.get("name") == "id"), {})
+    pattern = re.compile(id_field.get("pattern") or DEFAULT_ID_PATTERN)
+    min_len = id_field.get("min") or DEFAULT_ID_LENGTH
+    max_len = id_field.get("max") or DEFAULT_ID_LENGTH
+
+    def item(v):
+        if not isinstance(v, str) or not (min_len <= len(v) <= max_len) \
+                or not pattern.search(v):
+            return _err("validation_invalid_relation", f"Invalid relation id {v}.")
+        return None
+    return _multi_rule(field, item)
+
+
+def _json_rule(field):
+    max_size = field.get("maxSize") or 0
+
+    def check(value):
+        if max_size and len(json.dumps(value).encode("utf-8")) > max_size:
+            return _err("validation_json_size_limit",
+                        f"The maximum allowed JSON size is {max_size} bytes.")
+        return None
+    return check
+
+
+def _skip(value):
+    return None
+
+
+_RULES = {
+    "text": _text_rule,
+    "editor": lambda f: _skip,
+    "number": _number_rule,
+    "email": _email_rule,
+    "url": _url_rule,
+    "select": _select_rule,
+    "json": _json_rule,
+}
+
+
+class RecordValidator:
+    """Compiled validator for one collection. Build once, call per row."""
+
+    def __init__(self, collection, schemas=None):
+        self.collection = collection
+        self._rules = {}
+        self._required = []
+        for field in collection.get("fields", []):
+            ftype, name = field.get("type"), field.get("name")
+            if ftype in ("autodate", "file", "password") or field.get("primaryKey"):
+                continue  # server-generated, multipart-only or hashed
+            if ftype == "relation":
+                rule = _relation_rule(field, schemas or {})
+            else:
+                rule = _RULES.get(ftype, lambda f: _skip)(field)
+            self._rules[name] = rule
+            if field.get("required") and not (ftype == "text" and field.get("autogeneratePattern")):
+                self._required.append((name, ftype))
+
+    def validate(self, row, partial=False):
+        """
+        Check one row. ``partial`` (updates) skips required checks for
+        fields absent from the row.
+
+        Returns:
+            None if valid, else {field: {"code", "message"}}.
+        """
+        errors = None
+        for name, ftype in self._required:
+            if partial and name not in row:
+                continue
+            value = row.get(name)
+            if _blank(value) or (ftype == "number" and value == 0) \
+                    or (ftype == "bool" and value is not True):
+                errors = errors or {}
+                errors[name] = _err("validation_required", "Cannot be blank.")
+        for name, value in row.items():
+            rule = self._rules.get(name)
+            if rule is None or (errors and name in errors):
+                continue
+            error = rule(value)
+            if error:
+                errors = errors or {}
+                errors[name] = error
+        return errors
+
+
+def error_response(errors, action="create"):
+    """Wrap field errors in PocketBase's 400 response shape."""
+    return {"status": 400, "message": f"Failed to {action} record.", "data": errors}
+
+
+def get_validator(collection, target=None, refresh=False):
+    """Load (cached) schemas and compile a validator for ``collection``."""
+    schemas = load_schemas(target=target, refresh=refresh)
+    if collection not in schemas:
+        raise ValueError(f"Unknown collection: {collection}")
+    return RecordValidator(schemas[collection], schemas)
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+
+def main():
+    from pb_records import iter_rows
+
+    parser = argparse.ArgumentParser(description="Validate records locally")
+    parser.add_argument("collection", nargs="?", help="Collection name or ID")
+    parser.add_argument("json_data", nargs="?", help="JSON row")
+    parser.add_argument("--file", help="NDJSON or JSON array file ('-' for stdin)")
+    parser.add_argument("--partial", action="store_true",
+                        help="Validate as updates (skip missing required fields)")
+    parser.add_argument("--refresh", action="store_true", help="Ignore the schema cache")
+    args = parser.parse_args()
+
+    try:
+        if not args.collection:
+            schemas = load_schemas(refresh=args.refresh)
+            print_result(True, 200, {"message": "Schema cache refreshed",
+                                     "collections": len({c["id"] for c in schemas.values()})})
+            return
+        validator = get_validator(args.collection, refresh=args.refresh)
+    except ValueError as e:
+        print_result(False, 0, {"message": str(e)})
+        sys.exit(1)
+    except PBRequestError as e:
+        print_result(False, e.status, e.data)
+        sys.exit(1)
+
+    if args.file:
+        rows = iter_rows(args.file)
+    elif args.json_data:
+        rows = [json.loads(args.json_data)]
+    else:
+        print_result(False, 0, {"message": "JSON data or --file is required"})
+        sys.exit(1)
+
+    checked, invalid = 0, []
+    for i, row in enumerate(rows):
+        checked += 1
+        errors = validator.validate(row, partial=args.partial)
+        if errors:
+            invalid.append({"row": i, "error": error_response(
+                errors, "update" if args.partial else "create")})
+    print_result(not invalid, 200 if not invalid else 400, {
+        "checked": checked,
+        "invalid": len(invalid),
+        "errors": invalid[:50],
+    })
+    if invalid:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
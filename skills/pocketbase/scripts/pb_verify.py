@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+Hash-based record verification between instances or against a saved digest.
+
+Records are canonicalised (sorted-key JSON) and hashed in id order. Hashes
+are grouped into id-prefix ranges (``--depth`` characters, 36^depth ranges
+for default ids) whose digests roll up into one root per collection. Only
+ranges whose digests differ are fetched again to list the differing ids,
+so the drill-down cost follows the size of the difference.
+
+The digest pass still reads every record, but only ``id,updated`` by
+default, so it detects changes through the ``updated`` stamp; pass
+``--full`` (or ``--fields``) to hash record contents in that pass too,
+e.g. for copies whose ``updated`` stamps differ. The live drill-down
+hashes full records. Digest files also keep a short hash per record so a
+later compare can name the differing ids.
+
+Usage:
+  python scripts/pb_verify.py digest [collection ...] --out digests.json
+  python scripts/pb_verify.py compare [collection ...] --digest-file digests.json
+  python scripts/pb_verify.py compare [collection ...] --left staging --right production
+"""
+
+import argparse
+import hashlib
+import json
+import sys
+import os
+from concurrent.futures import ThreadPoolExecutor
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from pb_config import get_target, print_result, PBRequestError
+from pb_collections import fetch_all_collections
+from pb_records import iter_records, per_page_arg, _quote
+
+DEFAULT_DEPTH = 2
+DEFAULT_IGNORE = ("collectionId", "collectionName", "expand")
+# Projection for the digest pass unless --full or --fields is given
+DIGEST_FIELDS = "id,updated"
+# Hex characters kept per record hash in digest files
+LEAF_HASH_LENGTH = 16
+
+
+def record_hash(record, ignore):
+    canon = {k: v for k, v in record.items() if k not in ignore}
+    data = json.dumps(canon, sort_keys=True, separators=(",", ":"),
+                      ensure_ascii=False)
+    return hashlib.sha256(data.encode("utf-8")).digest()
+
+
+def _root(buckets):
+    h = hashlib.sha256()
+    for prefix in sorted(buckets):
+        count, digest = buckets[prefix]
+        h.update(f"{prefix}:{count}:{digest};".encode("utf-8"))
+    return h.hexdigest()
+
+
+def collection_digest(collection, depth=DEFAULT_DEPTH, fields=None,
+                      ignore=DEFAULT_IGNORE, per_page=1000, target=None, leaves=False):
+    """
+    Stream a collection once and compute its range digests.
+
+    With ``leaves``, also keep a short hash per record, grouped by range.
+
+    Returns:
+        {"count", "root", "buckets": {prefix: [count, hexdigest]}
+         [, "leaves": {prefix: {id: hash}}]}
+    """
+    buckets, leaf_map = {}, {}
+    prefix, hasher, count = None, None, 0
+    total = 0
+    for record in iter_records(collection, fields=fields, per_page=per_page,
+                               target=target):
+        rec_prefix = record["id"][:depth]
+        if rec_prefix != prefix:
+            if prefix is not None:
+                buckets[prefix] = [count, hasher.hexdigest()]
+            prefix, hasher, count = rec_prefix, hashlib.sha256(), 0
+        digest = record_hash(record, ignore)
+        hasher.update(digest)
+        if leaves:
+            leaf_map.setdefault(rec_prefix, {})[record["id"]] = \
+                digest.hex()[:LEAF_HASH_LENGTH]
+        count += 1
+        total += 1
+    if prefix is not None:
+        buckets[prefix] = [count, hasher.hexdigest()]
+    result = {"count": total, "root": _root(buckets), "buckets": buckets}
+    if leaves:
+        result["leaves"] = leaf_map
+    return result
+
+
+def range_hashes(collection, prefix, fields=None, ignore=DEFAULT_IGNORE,
+                 per_page=1000, target=None):
+    """Return {id: hash} for records whose id starts with ``prefix``.
+
+    Assumes ids use characters sorting below "~" (PocketBase's default
+    [a-z0-9] ids do).
+    """
+    filter_expr = f"id >= {_quote(prefix)} && id < {_quote(prefix + '~')}"
+    return {r["id"]: record_hash(r, ignore)
+            for r in iter_records(collection, filter_expr=filter_expr,
+                                  fields=fields, per_page=per_page, target=target)}
+
+
+def mismatched_ranges(left, right):
+    lb, rb = left["buckets"], right["buckets"]
+    return sorted(p for p in set(lb) | set(rb) if lb.get(p) != rb.get(p))
+
+
+def diff_hashes(left, right):
+    """Split two {id: hash} maps into (only_left, only_right, different)."""
+    return ([i for i in left if i not in right],
+            [i for i in right if i not in left],
+            [i for i in left if i in right and left[i] != right[i]])
+
+
+def _collections(names, target):
+    if names:
+        return names
+    return [c["name"] for c in fetch_all_collections(target=target)
+            if not c.get("system") and c.get("type") != "view"]
+
+
+def _options(args):
+    ignore = set(DEFAULT_IGNORE)
+    if args.ignore:
+        ignore.update(f.strip() for f in args.ignore.split(",") if f.strip())
+    fields = args.fields or (None if args.full else DIGEST_FIELDS)
+    return {"depth": args.depth, "fields": fields, "ignore": sorted(ignore)}
+
+
+def cmd_digest(args):
+    target = get_target(args.target)
+    opts = _options(args)
+    try:
+        names = _collections(args.collections, target)
+        digests = {name: collection_digest(name, opts["depth"], opts["fields"],
+                                           set(opts["ignore"]), args.perPage, target,
+                                           leaves=True)
+                   for name in names}
+    except PBRequestError as e:
+        print_result(False, e.status, e.data)
+        sys.exit(1)
+    with open(args.out, "w") as f:
+        json.dump({"version": 2, "options": opts, "collections": digests}, f)
+    print_result(True, 200, {
+        "message": f"Saved digests for {len(digests)} collection(s)",
+        "file": args.out,
+        "collections": {n: {"count": d["count"], "root": d["root"]}
+                        for n, d in digests.items()},
+    })
+
+
+def cmd_compare(args):
+    left = get_target(args.left)
+    right = get_target(args.right) if args.right else None
+    saved = None
+    if args.digest_file:
+        try:
+            with open(args.digest_file, "r") as f:
+                saved = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            print_result(False, 0, {"message": f"Cannot read digest file: {e}"})
+            sys.exit(1)
+        if saved.get("version") != 2:
+            print_result(False, 0, {"message": "Digest file is from an older version; "
+                                               "create it again with pb_verify.py digest"})
+            sys.exit(1)
+        opts = saved["options"]
+    elif right is None:
+        print_result(False, 0, {"message": "--right or --digest-file is required"})
+        sys.exit(1)
+    else:
+        opts = _options(args)
+    depth, fields, ignore = opts["depth"], opts["fields"], set(opts["ignore"])
+
+    def digest(name, target):
+        return collection_digest(name, depth, fields, ignore, args.perPage, target)
+
+    def hashes(name, prefix, target, projection=None):
+        return range_hashes(name, prefix, projection, ignore, args.perPage, target)
+
+    # Live drill-down hashes full records unless --fields narrows them
+    drill_fields = args.fields
+
+    report = {}
+    try:
+        names = args.collections or (list(saved["collections"]) if saved
+                                     else _collections(None, left))
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            for name in names:
+                if saved:
+                    rd = saved["collections"].get(name, {"count": 0, "root": None, "buckets": {}})
+                    ld = digest(name, left)
+                else:
+                    lf, rf = pool.submit(digest, name, left), pool.submit(digest, name, right)
+                    ld, rd = lf.result(), rf.result()
+                entry = {"match": ld["root"] == rd["root"],
+                         "count": {"left": ld["count"], "right": rd["count"]}}
+                if not entry["match"]:
+                    ranges = mismatched_ranges(ld, rd)
+                    entry["mismatchedRanges"] = ranges
+                    only_left, only_right, different = [], [], []
+                    for p in ranges:
+                        if saved:
+                            # Same projection as the saved leaves
+                            lh = {i: h.hex()[:LEAF_HASH_LENGTH]
+                                  for i, h in hashes(name, p, left, fields).items()}
+                            rh = rd.get("leaves", {}).get(p, {})
+                        else:
+                            lf = pool.submit(hashes, name, p, left, drill_fields)
+                            rf = pool.submit(hashes, name, p, right, drill_fields)
+                            lh, rh = lf.result(), rf.result()
+                        ol, orr, diff = diff_hashes(lh, rh)
+                        only_left += ol
+                        only_right += orr
+                        different += diff
+                    entry.update(onlyLeft=sorted(only_left),
+                                 onlyRight=sorted(only_right),
+                                 different=sorted(different))
+                report[name] = entry
+    except PBRequestError as e:
+        print_result(False, e.status, e.data)
+        sys.exit(1)
+
+    ok = all(e["match"] for e in report.values())
+    print_result(ok, 200, {"match": ok, "collections": report})
+    if not ok:
+        sys.exit(1)
+
+
+def _add_common(p):
+    p.add_argument("collections", nargs="*",
+                   help="Collections to verify (default: all non-system, non-view)")
+    p.add_argument("--depth", type=int, default=DEFAULT_DEPTH,
+                   help=f"Id prefix length per range (default: {DEFAULT_DEPTH})")
+    p.add_argument("--fields",
+                   help=f"Only hash these fields (default digest pass: {DIGEST_FIELDS})")
+    p.add_argument("--full", action="store_true",
+                   help="Hash full records in the digest pass, not just id,updated")
+    p.add_argument("--ignore", help="Comma-separated fields to leave out of hashes")
+    p.add_argument("--perPage", type=per_page_arg, default=1000,
+                   help="Records per request (default: 1000, the server maximum)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PocketBase record verification")
+    sub = parser.add_subparsers(dest="command")
+    sub.required = True
+
+    # digest
+    p_digest = sub.add_parser("digest", help="Save range digests to a file")
+    _add_common(p_digest)
+    p_digest.add_argument("--target", help="Target profile (default: PB_URL)")
+    p_digest.add_argument("--out", required=True, help="Digest file to write")
+    p_digest.set_defaults(func=cmd_digest)
+
+    # compare
+    p_compare = sub.add_parser("compare",
+        help="Compare two targets, or a target against a digest file")
+    _add_common(p_compare)
+    p_compare.add_argument("--left", help="Target profile (default: PB_URL)")
+    p_compare.add_argument("--right", help="Target profile to compare against")
+    p_compare.add_argument("--digest-file",
+                           help="Digest file to compare against (its options are reused)")
+    p_compare.set_defaults(func=cmd_compare)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()